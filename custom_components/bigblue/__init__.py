@@ -4,8 +4,37 @@ import logging
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
 
-from .coordinator import BigBlueDataUpdateCoordinator, BigBlueAPIClient
+from .const import (
+    CONF_DEVICE_TIMEOUT,
+    CONF_HOST,
+    CONF_PORT,
+    CONF_TRANSPORT,
+    CONF_UNIT_ID,
+    CONF_DISCOVERY_INTERVAL,
+    CONF_MAX_CONCURRENCY,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_SETTINGS_INTERVAL,
+    DEFAULT_DEVICE_TIMEOUT,
+    DEFAULT_DISCOVERY_INTERVAL,
+    DEFAULT_LOCAL_MAX_SCAN_INTERVAL,
+    DEFAULT_LOCAL_SCAN_INTERVAL,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_PORT,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SETTINGS_INTERVAL,
+    DEFAULT_UNIT_ID,
+    STORAGE_VERSION,
+    TRANSPORT_LOCAL,
+)
+from .api import BigBlueAPIClient
+from .coordinator import BigBlueDataUpdateCoordinator
+from .modbus import BigBlueModbusClient
+from .services import async_register_services
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -14,21 +43,44 @@ PLATFORMS = [Platform.SENSOR, Platform.BINARY_SENSOR, Platform.SWITCH, Platform.
 
 async def async_setup(hass, config):
     """Set up the Big Blue component."""
+    async_register_services(hass)
     return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up Big Blue from a config entry."""
     hass.data.setdefault(DOMAIN, {})
     
-    # Configuration
-    email = entry.data.get("email")
-    password = entry.data.get("password")
-    
-    # Initialisation du client API
-    api_client = BigBlueAPIClient(email, password)
+    if entry.data.get(CONF_TRANSPORT) == TRANSPORT_LOCAL:
+        # Batterie lue directement en Modbus TCP sur le réseau local
+        api_client = BigBlueModbusClient(
+            entry.data[CONF_HOST],
+            entry.data.get(CONF_PORT, DEFAULT_PORT),
+            entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID),
+        )
+        scan_interval = DEFAULT_LOCAL_SCAN_INTERVAL
+        min_scan_interval = DEFAULT_LOCAL_SCAN_INTERVAL
+        max_scan_interval = DEFAULT_LOCAL_MAX_SCAN_INTERVAL
+    else:
+        # Client API cloud (session HTTP dédiée, fermée au déchargement)
+        api_client = BigBlueAPIClient(entry.data.get("email"), entry.data.get("password"))
+        scan_interval = DEFAULT_SCAN_INTERVAL
+        min_scan_interval = entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL)
+        max_scan_interval = entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
     
     # Initialisation du coordinateur
-    coordinator = BigBlueDataUpdateCoordinator(hass, api_client)
+    coordinator = BigBlueDataUpdateCoordinator(
+        hass,
+        api_client,
+        max_concurrency=entry.options.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY),
+        device_timeout=entry.options.get(CONF_DEVICE_TIMEOUT, DEFAULT_DEVICE_TIMEOUT),
+        settings_interval=entry.options.get(CONF_SETTINGS_INTERVAL, DEFAULT_SETTINGS_INTERVAL),
+        min_scan_interval=min_scan_interval,
+        max_scan_interval=max_scan_interval,
+        store=_async_get_store(hass, entry),
+        discovery_interval=entry.options.get(CONF_DISCOVERY_INTERVAL, DEFAULT_DISCOVERY_INTERVAL),
+        entry_id=entry.entry_id,
+        scan_interval=scan_interval,
+    )
     
     # Stockage des données
     hass.data[DOMAIN][entry.entry_id] = {
@@ -36,12 +88,28 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         "api_client": api_client
     }
     
-    # Démarrage du coordinateur
-    await coordinator.async_config_entry_first_refresh()
+    # Démarrage du coordinateur : depuis le cache local si disponible (les
+    # entités sont créées immédiatement et le premier rafraîchissement
+    # s'exécute en arrière-plan), sinon en attendant la réponse du cloud
+    try:
+        if await coordinator.async_restore_cache():
+            entry.async_create_background_task(
+                hass, coordinator.async_refresh(), f"{DOMAIN}_first_refresh"
+            )
+        else:
+            await coordinator.async_config_entry_first_refresh()
+    except Exception:
+        # Ne pas laisser de session (ou connexion) ouverte si l'entrée doit être réessayée
+        hass.data[DOMAIN].pop(entry.entry_id)
+        await api_client.async_close()
+        raise
     
     # Configuration des plateformes (capteurs)
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     
+    # Options modifiées (intervalles, concurrence) : rechargement de l'entrée
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    
     # Création des appareils Home Assistant pour chaque batterie
     devices_data = coordinator.data
     if devices_data:
@@ -50,7 +118,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         for device_mac, device_info in devices_data.items():
             # Vérifier que ce n'est pas un device par défaut
             if device_mac == "default" or device_info.get("offline", False):
-                _LOGGER.warning(f"⚠️ Device {device_mac} ignoré (par défaut ou hors ligne)")
+                _LOGGER.warning("⚠️ Device %s ignoré (par défaut ou hors ligne)", device_mac)
                 continue
                 
             device_name = device_info.get("device_name", f"Big Blue {device_mac}")
@@ -59,7 +127,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             # Vérifier si le device existe déjà
             existing_device = device_registry.async_get_device(identifiers={(DOMAIN, device_mac)})
             if existing_device:
-                _LOGGER.info(f"📱 Device existant trouvé: {device_name} ({device_mac})")
+                _LOGGER.info("📱 Device existant trouvé: %s (%s)", device_name, device_mac)
                 continue
             
             device_registry.async_get_or_create(
@@ -71,7 +139,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
                 sw_version="1.0.0"
             )
             
-            _LOGGER.info(f"📱 Appareil créé: {device_name} ({device_mac})")
+            _LOGGER.info("📱 Appareil créé: %s (%s)", device_name, device_mac)
     else:
         _LOGGER.warning("⚠️ Aucune donnée du coordinateur - Aucun device créé")
     
@@ -79,11 +147,28 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     
     return True
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Recharge l'entrée pour appliquer les nouvelles options."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload Big Blue config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        # Aucun envoi différé ne doit rouvrir de session après la fermeture
+        entry_data["coordinator"].async_cancel_commands()
+        # Fermer la session HTTP (ou la connexion Modbus) propre à cette entrée
+        await entry_data["api_client"].async_close()
     
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Supprime le cache local d'une entrée supprimée."""
+    await _async_get_store(hass, entry).async_remove()
+
+
+def _async_get_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    """Cache local (appareils et dernières données) propre à une entrée."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
@@ -0,0 +1,123 @@
+"""Indicateurs énergétiques dérivés de la télémétrie, calculés de façon incrémentale."""
+from __future__ import annotations
+
+from .const import (
+    ANALYTICS_MAX_GAP,
+    ANALYTICS_MIN_CHARGED,
+    ANALYTICS_POWER_SMOOTHING,
+    BATTERY_CHARGE_POSITIVE,
+)
+from .snapshot import DeviceSnapshot
+
+# Champs de DeviceSnapshot calculés ici
+DERIVED_FIELDS = (
+    "time_to_empty",
+    "time_to_full",
+    "round_trip_efficiency",
+    "self_consumption",
+    "charged_energy",
+    "discharged_energy",
+)
+
+# Zones mortes des indicateurs dérivés (voir changes.ChangeTracker)
+DERIVED_DEADBANDS = {
+    "time_to_empty": 0.05,  # h
+    "time_to_full": 0.05,  # h
+    "round_trip_efficiency": 0.1,  # %
+    "self_consumption": 0.1,  # %
+}
+
+
+class EnergyAnalytics:
+    """Autonomie, temps de charge, rendement et énergies d'une batterie.
+
+    Chaque mesure est traitée en O(1) : la puissance est lissée par moyenne
+    exponentielle et les énergies chargée / déchargée sont intégrées par la
+    méthode des trapèzes entre deux mesures (en séparant le passage par zéro).
+    """
+
+    __slots__ = ("charged", "discharged", "_last_time", "_last_power", "_smoothed")
+
+    def __init__(self, charged: float = 0.0, discharged: float = 0.0) -> None:
+        """Initialise les compteurs (reprise possible depuis le cache local)."""
+        self.charged = charged  # kWh
+        self.discharged = discharged  # kWh
+        self._last_time: float | None = None
+        self._last_power: float | None = None
+        self._smoothed: float | None = None
+
+    def update(self, timestamp: float, snapshot: DeviceSnapshot) -> dict[str, float | None]:
+        """Intègre une mesure et retourne les indicateurs dérivés."""
+        power = snapshot.power if isinstance(snapshot.power, (int, float)) else None
+        if power is not None and not BATTERY_CHARGE_POSITIVE:
+            power = -power
+
+        if power is not None:
+            if self._last_time is not None and self._last_power is not None:
+                hours = (timestamp - self._last_time) / 3600
+                if 0 < hours * 3600 <= ANALYTICS_MAX_GAP:
+                    self._integrate(self._last_power, power, hours)
+            # Le lissage repart de zéro quand la batterie change de sens
+            if self._smoothed is None or (self._smoothed >= 0) != (power >= 0):
+                self._smoothed = power
+            else:
+                self._smoothed += ANALYTICS_POWER_SMOOTHING * (power - self._smoothed)
+            self._last_time = timestamp
+            self._last_power = power
+
+        return {
+            "time_to_empty": self._time_to_empty(snapshot),
+            "time_to_full": self._time_to_full(snapshot),
+            "round_trip_efficiency": (
+                round(self.discharged / self.charged * 100, 1)
+                if self.charged >= ANALYTICS_MIN_CHARGED
+                else None
+            ),
+            "self_consumption": _self_consumption(snapshot),
+            "charged_energy": round(self.charged, 3),
+            "discharged_energy": round(self.discharged, 3),
+        }
+
+    def _integrate(self, previous: float, current: float, hours: float) -> None:
+        """Méthode des trapèzes (W·h -> kWh), avec séparation au passage par zéro."""
+        if (previous >= 0) == (current >= 0):
+            energy = (previous + current) / 2 * hours / 1000
+            if energy >= 0:
+                self.charged += energy
+            else:
+                self.discharged -= energy
+            return
+        # Changement de signe : deux triangles de part et d'autre du zéro
+        crossing = abs(previous) / (abs(previous) + abs(current))
+        first = previous / 2 * hours * crossing / 1000
+        second = current / 2 * hours * (1 - crossing) / 1000
+        for energy in (first, second):
+            if energy >= 0:
+                self.charged += energy
+            else:
+                self.discharged -= energy
+
+    def _time_to_empty(self, snapshot: DeviceSnapshot) -> float | None:
+        """Heures avant d'atteindre le seuil de décharge, au rythme de décharge actuel."""
+        if self._smoothed is None or self._smoothed >= 0:
+            return None
+        remaining = snapshot.remaining_capacity or 0.0
+        reserve = (snapshot.rated_capacity or 0.0) * (snapshot.discharge_threshold or 0) / 100
+        usable = max(remaining - reserve, 0.0)
+        return round(usable * 1000 / -self._smoothed, 2)
+
+    def _time_to_full(self, snapshot: DeviceSnapshot) -> float | None:
+        """Heures avant la charge complète, au rythme de charge actuel."""
+        if self._smoothed is None or self._smoothed <= 0:
+            return None
+        missing = max((snapshot.rated_capacity or 0.0) - (snapshot.remaining_capacity or 0.0), 0.0)
+        return round(missing * 1000 / self._smoothed, 2)
+
+
+def _self_consumption(snapshot: DeviceSnapshot) -> float | None:
+    """Part de la production solaire du jour restituée par la batterie (%)."""
+    generation = snapshot.daily_generation
+    output = snapshot.daily_output_energy
+    if not isinstance(generation, (int, float)) or not isinstance(output, (int, float)) or generation <= 0:
+        return None
+    return round(min(output / generation, 1.0) * 100, 1)
@@ -0,0 +1,386 @@
+"""Client API Powafree pour l'intégration Big Blue."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Callable
+from types import MappingProxyType
+from typing import Any, NamedTuple
+
+import aiohttp
+
+from .auth import TokenManager
+from .const import (
+    API_BASE_URL,
+    API_MAX_RETRIES,
+    API_RETRY_BACKOFF,
+    API_RETRY_BACKOFF_MAX,
+    API_TIMEOUT,
+    DNS_CACHE_TTL,
+    KEEPALIVE_TIMEOUT,
+    MAX_CONNECTIONS_PER_HOST,
+)
+from .throttle import LogThrottle
+
+_LOGGER = logging.getLogger(__name__)
+
+# Endpoints Powafree
+ENDPOINT_LOGIN = "/api/user/login/email"
+ENDPOINT_DEVICE_LIST = "/api/devices/list"
+ENDPOINT_LAST_DATA = "/api/devices/last_data"
+ENDPOINT_SETTINGS_DOWNLOAD = "/api/devices/setting/download"
+ENDPOINT_SETTINGS_UPLOAD = "/api/devices/setting/upload"
+
+# Codes de réponse Powafree
+CODE_OK = 0
+CODE_DEVICE_OFFLINE = 1002
+CODE_INVALID_TOKEN = 1009
+CODE_RECORD_NOT_FOUND = 1013
+
+# En-têtes communs, construits une seule fois
+BASE_HEADERS = MappingProxyType({
+    "Accept": "application/json",
+    "Accept-Language": "fr",
+    "Content-Type": "application/json",
+    "User-Agent": "okhttp/3.14.9",
+})
+
+
+class BigBlueApiError(Exception):
+    """Erreur retournée par l'API Powafree."""
+
+    def __init__(self, message: str, code: int | None = None) -> None:
+        """Initialise l'erreur avec le code Powafree éventuel."""
+        super().__init__(message)
+        self.code = code
+
+
+class BigBlueConnectionError(BigBlueApiError):
+    """Erreur réseau ou HTTP (nouvelle tentative possible)."""
+
+
+class BigBlueAuthError(BigBlueApiError):
+    """Jeton invalide et renouvellement impossible."""
+
+
+class BigBlueDeviceOfflineError(BigBlueApiError):
+    """Appareil hors ligne (code 1002)."""
+
+
+class BigBlueRecordNotFoundError(BigBlueApiError):
+    """Aucun enregistrement pour cet appareil (code 1013)."""
+
+
+class BigBlueSettingsConflictError(BigBlueApiError):
+    """Paramètres relus différents de ceux envoyés (écriture concurrente ou refusée)."""
+
+    def __init__(self, message: str, settings: dict[str, Any]) -> None:
+        """Conserve les paramètres relus pour rafraîchir le cache."""
+        super().__init__(message)
+        self.settings = settings
+
+
+_CODE_ERRORS: dict[int, type[BigBlueApiError]] = {
+    CODE_DEVICE_OFFLINE: BigBlueDeviceOfflineError,
+    CODE_INVALID_TOKEN: BigBlueAuthError,
+    CODE_RECORD_NOT_FOUND: BigBlueRecordNotFoundError,
+}
+
+
+class RequestRecord(NamedTuple):
+    """Trace d'une tentative de requête transmise aux observateurs."""
+
+    endpoint: str
+    duration: float  # Secondes
+    code: int | None  # Code Powafree, None si aucune réponse exploitable
+    attempt: int  # 1 pour la première tentative
+    error: str | None  # Type d'erreur réseau / HTTP éventuelle
+    device: str | None = None  # MAC de l'appareil visé (bleMac), le cas échéant
+
+
+RequestListener = Callable[[RequestRecord], None]
+
+
+class BigBlueAPIClient:
+    """Client API pour Powafree."""
+    
+    # Mode et seuil de décharge lisibles et modifiables (voir modbus.py)
+    supports_settings = True
+    # Champs de télémétrie fournis (None : toute la table des champs)
+    field_keys: frozenset[str] | None = None
+    
+    def __init__(
+        self,
+        email: str,
+        password: str,
+        session: aiohttp.ClientSession | None = None,
+    ):
+        """Initialise le client API.
+
+        Si aucune session n'est fournie, le client crée et possède sa propre
+        session (connexions persistantes, cache DNS) et la ferme dans async_close.
+        """
+        self.email = email
+        self.password = password
+        self.base_url = API_BASE_URL
+        self.token = None
+        self.user_id = None
+        self.session = session
+        self._owns_session = session is None
+        self._timeout = aiohttp.ClientTimeout(total=API_TIMEOUT)
+        self._auth_headers = BASE_HEADERS
+        self._listeners: list[RequestListener] = []
+        # Avertissements répétés (jeton, appareils hors ligne) limités
+        self._log_throttle = LogThrottle(_LOGGER)
+        # Renouvellement du jeton unique et partagé entre toutes les requêtes
+        self._tokens = TokenManager(self.authenticate, lambda: self.token)
+    
+    async def __aenter__(self):
+        """Context manager entry."""
+        self._ensure_session()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        await self.async_close()
+    
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        """Retourne la session HTTP, en créant une session dédiée si nécessaire."""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=MAX_CONNECTIONS_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+            self._owns_session = True
+        return self.session
+    
+    async def async_close(self) -> None:
+        """Ferme la session HTTP si elle appartient au client."""
+        if self._owns_session and self.session is not None and not self.session.closed:
+            await self.session.close()
+        if self._owns_session:
+            self.session = None
+    
+    def add_request_listener(self, listener: RequestListener) -> Callable[[], None]:
+        """Abonne un observateur (durées, métriques) à chaque tentative de requête.
+
+        Retourne une fonction de désabonnement.
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+    
+    def _set_token(self, token: str | None) -> None:
+        """Mémorise le jeton et reconstruit les en-têtes authentifiés."""
+        self.token = token
+        self._auth_headers = MappingProxyType({**BASE_HEADERS, "Authorization": token or ""})
+        self._tokens.token_updated(token)
+    
+    async def async_ensure_token(self) -> bool:
+        """Garantit un jeton valide avant une requête (connexion partagée si besoin)."""
+        return await self._tokens.async_ensure_token()
+    
+    async def async_request(
+        self,
+        endpoint: str,
+        payload: dict | None = None,
+        *,
+        authenticated: bool = True,
+    ) -> Any:
+        """Envoie une requête à l'API Powafree et retourne son champ `data`.
+
+        Pipeline commun à tous les endpoints :
+        - erreurs réseau et HTTP 5xx : nouvelles tentatives avec backoff aléatoire ;
+        - autres statuts HTTP : exception BigBlueApiError, sans nouvelle tentative ;
+        - code 1009 : renouvellement partagé du jeton puis nouvelle tentative ;
+        - autres codes non nuls : exception BigBlueApiError (ou sous-classe).
+        """
+        if authenticated:
+            if not await self.async_ensure_token():
+                raise BigBlueAuthError("Aucun jeton valide", CODE_INVALID_TOKEN)
+            # L'identifiant utilisateur n'est connu qu'après la connexion
+            payload = {**(payload or {}), "userId": self.user_id}
+        
+        session = self._ensure_session()
+        url = f"{self.base_url}{endpoint}"
+        attempt = 0
+        token_renewed = False
+        
+        while True:
+            attempt += 1
+            token = self.token
+            headers = self._auth_headers if authenticated else BASE_HEADERS
+            response_data = None
+            failure: BigBlueApiError | None = None
+            start = time.monotonic()
+            
+            try:
+                async with session.post(
+                    url, json=payload, headers=headers, timeout=self._timeout
+                ) as response:
+                    if response.status >= 500:
+                        failure = BigBlueConnectionError(f"HTTP {response.status} pour {endpoint}")
+                    elif response.status != 200:
+                        # Erreur du client : tracée comme les autres, sans nouvelle tentative
+                        failure = BigBlueApiError(f"HTTP {response.status} pour {endpoint}")
+                    else:
+                        response_data = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                failure = BigBlueConnectionError(
+                    f"{type(err).__name__} pour {endpoint}: {err}"
+                )
+            
+            code = response_data.get("code") if isinstance(response_data, dict) else None
+            if self._listeners:
+                record = RequestRecord(
+                    endpoint,
+                    time.monotonic() - start,
+                    code,
+                    attempt,
+                    type(failure).__name__ if failure else None,
+                    payload.get("bleMac") if payload else None,
+                )
+                for listener in self._listeners:
+                    listener(record)
+            
+            if failure is not None:
+                if not isinstance(failure, BigBlueConnectionError) or attempt > API_MAX_RETRIES:
+                    raise failure
+                await asyncio.sleep(self._backoff_delay(attempt))
+                continue
+            
+            if code == CODE_OK:
+                return response_data.get("data")
+            
+            if code == CODE_INVALID_TOKEN and authenticated and not token_renewed:
+                self._log_throttle.warning(
+                    ("token", endpoint),
+                    "🔄 Token expiré pour %s, tentative de renouvellement...",
+                    endpoint,
+                )
+                token_renewed = True
+                if await self._tokens.async_renew(token):
+                    continue
+            
+            message = response_data.get("message") if isinstance(response_data, dict) else None
+            error_class = _CODE_ERRORS.get(code, BigBlueApiError)
+            raise error_class(f"{message or 'Erreur inconnue'} (Code: {code})", code)
+    
+    @staticmethod
+    def _backoff_delay(attempt: int) -> float:
+        """Délai avant la tentative suivante (backoff exponentiel, jitter complet)."""
+        cap = min(API_RETRY_BACKOFF_MAX, API_RETRY_BACKOFF * 2 ** (attempt - 1))
+        return random.uniform(0, cap)
+    
+    async def authenticate(self) -> bool:
+        """Authentification sur l'API Powafree."""
+        _LOGGER.debug("🔐 Tentative de connexion à %s%s", self.base_url, ENDPOINT_LOGIN)
+        
+        try:
+            user_data = await self.async_request(
+                ENDPOINT_LOGIN,
+                {"email": self.email, "password": self.password},
+                authenticated=False,
+            )
+        except BigBlueApiError as err:
+            _LOGGER.error("❌ Erreur d'authentification: %s", err)
+            return False
+        except Exception as e:
+            _LOGGER.error(
+                "❌ Erreur de connexion (%s) à %s%s: %s",
+                type(e).__name__, self.base_url, ENDPOINT_LOGIN, e,
+            )
+            return False
+        
+        try:
+            self.user_id = user_data["userId"]
+            self._set_token(user_data["token"])
+        except (KeyError, TypeError):
+            _LOGGER.error("❌ Réponse d'authentification inattendue")
+            return False
+        
+        _LOGGER.info("✅ Authentification réussie pour %s", user_data.get("name", "N/A"))
+        return True
+    
+    async def get_devices(self) -> list:
+        """Récupère la liste des appareils."""
+        _LOGGER.debug("📋 Récupération des appareils depuis %s%s", self.base_url, ENDPOINT_DEVICE_LIST)
+        
+        try:
+            devices = await self.async_request(ENDPOINT_DEVICE_LIST) or []
+        except BigBlueApiError as err:
+            self._log_throttle.error("device_list", "❌ Erreur récupération appareils: %s", err)
+            return []
+        
+        if devices:
+            _LOGGER.debug("Appareil trouvé: %s", devices[0].get("name", "N/A"))
+        return devices
+    
+    async def async_get_last_data(self, device_mac: str) -> dict:
+        """Récupère la télémétrie d'un appareil.
+
+        Lève BigBlueDeviceOfflineError (1002), BigBlueRecordNotFoundError (1013)
+        ou BigBlueApiError pour les autres échecs.
+        """
+        device_data = await self.async_request(
+            ENDPOINT_LAST_DATA, {"bleMac": device_mac}
+        ) or {}
+        device_data["last_update"] = asyncio.get_event_loop().time()
+        return device_data
+    
+    async def async_patch_settings(
+        self,
+        device_mac: str,
+        patch: dict[str, Any],
+        settings: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Modifie quelques paramètres d'un appareil sans écraser les autres.
+
+        `patch` (clés API, voir fields.encode_settings) est fusionné sur
+        `settings`, les derniers paramètres connus, téléchargés si absents. Le
+        jeu complet est envoyé en une requête puis relu : retourne les
+        paramètres relus, ou lève BigBlueSettingsConflictError si une valeur
+        du patch n'a pas été appliquée.
+        """
+        if not settings:
+            settings = await self.async_request(
+                ENDPOINT_SETTINGS_DOWNLOAD, {"bleMac": device_mac}
+            ) or {}
+            if not settings:
+                raise BigBlueApiError(f"Paramètres indisponibles pour {device_mac}")
+        
+        await self.async_request(
+            ENDPOINT_SETTINGS_UPLOAD, {**settings, **patch, "bleMac": device_mac}
+        )
+        
+        # Relecture : détecte une écriture concurrente ou une valeur refusée
+        current = await self.async_request(
+            ENDPOINT_SETTINGS_DOWNLOAD, {"bleMac": device_mac}
+        ) or {}
+        conflicts = {
+            key: current.get(key) for key, value in patch.items() if current.get(key) != value
+        }
+        if conflicts:
+            raise BigBlueSettingsConflictError(
+                f"Paramètres non appliqués pour {device_mac}: {conflicts}", current
+            )
+        return current
+    
+    async def get_device_settings(self, device_mac: str) -> dict:
+        """Récupère les paramètres actuels d'un appareil."""
+        if not device_mac:
+            _LOGGER.error("Device MAC manquant pour get_device_settings")
+            return {}
+        
+        try:
+            return await self.async_request(
+                ENDPOINT_SETTINGS_DOWNLOAD, {"bleMac": device_mac}
+            ) or {}
+        except BigBlueApiError as err:
+            self._log_throttle.error(
+                ("settings", device_mac), "❌ Erreur récupération paramètres pour %s: %s", device_mac, err
+            )
+            return {}
@@ -0,0 +1,99 @@
+"""Gestion du cycle de vie du jeton Powafree."""
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from .const import TOKEN_REFRESH_MARGIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def jwt_expiry(token: str | None) -> float | None:
+    """Retourne l'expiration (timestamp UNIX) d'un JWT, ou None si elle est inconnue."""
+    if not token:
+        return None
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    payload = parts[1]
+    try:
+        decoded = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+        exp = json.loads(decoded).get("exp")
+    except (binascii.Error, ValueError, UnicodeDecodeError, AttributeError):
+        return None
+    if isinstance(exp, (int, float)):
+        return float(exp)
+    return None
+
+
+class TokenManager:
+    """Renouvellement du jeton partagé entre toutes les requêtes.
+
+    Une seule connexion est en cours à la fois : les requêtes concurrentes qui
+    constatent un jeton expiré attendent toutes le même renouvellement. Si le
+    JWT expose `exp`, le jeton est renouvelé avant son expiration.
+    """
+
+    def __init__(
+        self,
+        login: Callable[[], Awaitable[bool]],
+        get_token: Callable[[], str | None],
+        refresh_margin: float = TOKEN_REFRESH_MARGIN,
+    ) -> None:
+        """Initialise le gestionnaire de jeton."""
+        self._login = login
+        self._get_token = get_token
+        self.refresh_margin = refresh_margin
+        self.expires_at: float | None = None
+        self._inflight: asyncio.Task | None = None
+
+    def token_updated(self, token: str | None) -> None:
+        """Enregistre un nouveau jeton obtenu par connexion."""
+        self.expires_at = jwt_expiry(token)
+
+    @property
+    def needs_refresh(self) -> bool:
+        """Indique si le jeton est absent ou proche de son expiration."""
+        if not self._get_token():
+            return True
+        if self.expires_at is None:
+            return False
+        return time.time() >= self.expires_at - self.refresh_margin
+
+    async def async_ensure_token(self) -> bool:
+        """Garantit un jeton valide, en le renouvelant de manière proactive si besoin."""
+        if not self.needs_refresh:
+            return True
+        if self._get_token():
+            _LOGGER.info("🔄 Jeton proche de l'expiration, renouvellement anticipé...")
+        return await self.async_renew()
+
+    async def async_renew(self, stale_token: str | None = None) -> bool:
+        """Renouvelle le jeton en une seule connexion partagée par tous les appelants.
+
+        `stale_token` est le jeton refusé par l'API : s'il a déjà été remplacé
+        par un autre appelant, aucune nouvelle connexion n'est lancée.
+        """
+        if stale_token is not None and self._get_token() not in (None, stale_token):
+            return True
+
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._login())
+            self._inflight.add_done_callback(self._login_done)
+
+        # shield : l'annulation d'un appelant (délai par appareil) ne doit pas
+        # interrompre la connexion attendue par les autres
+        return await asyncio.shield(self._inflight)
+
+    def _login_done(self, task: asyncio.Task) -> None:
+        """Libère la connexion en cours une fois terminée."""
+        self._inflight = None
+        if not task.cancelled():
+            # Évite l'avertissement "exception never retrieved" sans appelant
+            task.exception()
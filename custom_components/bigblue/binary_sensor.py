@@ -6,14 +6,19 @@ from typing import Any
 
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
+from .entity import BigBlueDeviceEntity
 
 _LOGGER = logging.getLogger(__name__)
 
+# Clés des capteurs binaires, identifiés par "bigblue_<clé>" avant le multi-appareils
+BINARY_SENSOR_KEYS = ("bms_enable", "grid_enable")
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -23,45 +28,86 @@ async def async_setup_entry(
     """Configure les capteurs binaires Big Blue."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
     
-    entities = [
-        BigBlueBMSEnableBinarySensor(coordinator, "bms_enable", "BMS Activé"),
-        BigBlueGridEnableBinarySensor(coordinator, "grid_enable", "Réseau Activé"),
-    ]
+    # Transport local : les paramètres ne sont ni lus ni modifiables
+    if not coordinator.api_client.supports_settings:
+        return
+    
+    if not coordinator.data:
+        _LOGGER.warning("⚠️ Aucune donnée du coordinateur - Aucun capteur binaire créé")
+    elif len(coordinator.data) == 1:
+        # Avec une seule batterie, les anciens identifiants lui reviennent sans ambiguïté
+        await _async_migrate_unique_ids(hass, config_entry, next(iter(coordinator.data)))
     
-    async_add_entities(entities)
+    @callback
+    def _async_add_devices(device_macs: list[str]) -> None:
+        """Crée les capteurs binaires des batteries nouvellement découvertes (issus des paramètres)."""
+        entities = []
+        for device_mac in device_macs:
+            device_info = coordinator.data.get(device_mac, {})
+            device_name = device_info.get("device_name", f"Big Blue {device_mac}")
+            
+            entities.extend([
+                BigBlueBMSEnableBinarySensor(coordinator, "bms_enable", f"BMS Activé {device_name}", device_mac),
+                BigBlueGridEnableBinarySensor(coordinator, "grid_enable", f"Réseau Activé {device_name}", device_mac),
+            ])
+        
+        async_add_entities(entities)
+    
+    # Ajout des batteries présentes puis de celles découvertes plus tard
+    config_entry.async_on_unload(coordinator.async_add_device_listener(_async_add_devices))
+
 
+async def _async_migrate_unique_ids(hass: HomeAssistant, config_entry: ConfigEntry, device_mac: str) -> None:
+    """Rattache les capteurs binaires "bigblue_<clé>" à la batterie (bigblue_<MAC>_<clé>)."""
+    entity_registry = er.async_get(hass)
+    legacy_ids = {f"bigblue_{key}": key for key in BINARY_SENSOR_KEYS}
 
-class BigBlueBinarySensor(CoordinatorEntity, BinarySensorEntity):
-    """Capteur binaire de base pour Big Blue."""
+    @callback
+    def _migrate(entry: er.RegistryEntry) -> dict[str, Any] | None:
+        key = legacy_ids.get(entry.unique_id)
+        if entry.domain != "binary_sensor" or key is None:
+            return None
+        new_unique_id = f"bigblue_{device_mac}_{key}"
+        # Entité déjà recréée sous le nouvel identifiant : l'ancienne reste orpheline
+        if entity_registry.async_get_entity_id("binary_sensor", DOMAIN, new_unique_id):
+            return None
+        _LOGGER.info("🔄 Migration de %s vers %s", entry.unique_id, new_unique_id)
+        return {"new_unique_id": new_unique_id}
+
+    await er.async_migrate_entries(hass, config_entry.entry_id, _migrate)
+
+
+class BigBlueBinarySensor(BigBlueDeviceEntity, BinarySensorEntity):
+    """Capteur binaire de base pour Big Blue (paramètre activé ou non, sans classe d'appareil)."""
+    
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
     
-    def __init__(self, coordinator, key: str, name: str):
+    def __init__(self, coordinator, key: str, name: str, device_mac: str):
         """Initialise le capteur binaire."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, device_mac)
         self._key = key
-        self._attr_name = f"Big Blue {name}"
-        self._attr_unique_id = f"bigblue_{key}"
+        self._watched_keys = (key,)
+        self._attr_name = name
+        self._attr_unique_id = f"bigblue_{device_mac}_{key}"
     
     @property
     def is_on(self) -> bool:
         """Retourne l'état du capteur binaire."""
-        if self.coordinator.data and self._key in self.coordinator.data:
-            return self.coordinator.data[self._key]
-        return False
+        snapshot = self.snapshot
+        return snapshot is not None and getattr(snapshot, self._key)
 
 
 class BigBlueBMSEnableBinarySensor(BigBlueBinarySensor):
     """Capteur binaire BMS activé."""
     
-    def __init__(self, coordinator, key: str, name: str):
-        super().__init__(coordinator, key, name)
+    def __init__(self, coordinator, key: str, name: str, device_mac: str):
+        super().__init__(coordinator, key, name, device_mac)
         self._attr_icon = "mdi:battery"
-        self._attr_device_class = "switch"
 
 
 class BigBlueGridEnableBinarySensor(BigBlueBinarySensor):
     """Capteur binaire réseau activé."""
     
-    def __init__(self, coordinator, key: str, name: str):
-        super().__init__(coordinator, key, name)
+    def __init__(self, coordinator, key: str, name: str, device_mac: str):
+        super().__init__(coordinator, key, name, device_mac)
         self._attr_icon = "mdi:transmission-tower"
-        self._attr_device_class = "switch"
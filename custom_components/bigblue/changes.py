@@ -0,0 +1,94 @@
+"""Détection des valeurs modifiées entre deux mises à jour du coordinateur."""
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+# Champs dont le changement concerne toutes les entités de l'appareil
+# (disponibilité, attribut "stale", nom)
+DEVICE_WIDE_KEYS = ("offline", "stale", "device_name")
+
+
+class ChangeTracker:
+    """Compare chaque cycle aux dernières valeurs publiées, avec zones mortes.
+
+    Un champ numérique muni d'une zone morte n'est considéré comme modifié que
+    si l'écart avec la dernière valeur publiée atteint cette zone (ou si la
+    valeur revient à zéro) : une dérive lente finit donc toujours par être
+    publiée. Les autres champs sont modifiés dès que leur valeur change.
+    """
+
+    def __init__(self, deadbands: Mapping[str, float] | None = None) -> None:
+        """Initialise le suivi."""
+        self.deadbands = dict(deadbands or {})
+        self._published: dict[str, dict[str, Any]] = {}
+        # MAC -> (instantané, version) lors de la dernière comparaison
+        self._versions: dict[str, tuple[object, int]] = {}
+        # MAC -> champs modifiés au dernier cycle (None : tous)
+        self._changed: dict[str, frozenset[str] | None] = {}
+
+    def update(self, data: Mapping[str, Mapping[str, Any]]) -> None:
+        """Calcule les champs modifiés de chaque appareil pour ce cycle."""
+        changed_by_device = {
+            device_mac: self._diff(device_mac, device_data)
+            for device_mac, device_data in data.items()
+        }
+
+        # Les appareils absents de ce cycle sont oubliés
+        for device_mac in self._published.keys() - data.keys():
+            del self._published[device_mac]
+            self._versions.pop(device_mac, None)
+        self._changed = changed_by_device
+
+    def update_device(self, device_mac: str, device_data: Mapping[str, Any]) -> None:
+        """Calcule les champs modifiés d'un seul appareil (rafraîchissement ciblé).
+
+        Les autres appareils sont laissés de côté : leurs changements éventuels
+        seront publiés par le prochain cycle complet.
+        """
+        self._changed = {device_mac: self._diff(device_mac, device_data)}
+
+    def _diff(self, device_mac: str, device_data: Mapping[str, Any]) -> frozenset[str] | None:
+        """Champs modifiés d'un appareil depuis la dernière publication (None : tous)."""
+        # Instantané versionné inchangé depuis la comparaison précédente
+        version = getattr(device_data, "version", None)
+        if version is not None:
+            if self._versions.get(device_mac) == (device_data, version):
+                return frozenset()
+            self._versions[device_mac] = (device_data, version)
+
+        published = self._published.get(device_mac)
+        if published is None or any(
+            device_data.get(key) != published.get(key) for key in DEVICE_WIDE_KEYS
+        ):
+            self._published[device_mac] = dict(device_data.items())
+            return None
+
+        changed = []
+        for key, value in device_data.items():
+            previous = published.get(key)
+            if value == previous:
+                continue
+            deadband = self.deadbands.get(key)
+            if (
+                deadband
+                and isinstance(value, (int, float))
+                and isinstance(previous, (int, float))
+                and value != 0
+                and abs(value - previous) < deadband
+            ):
+                continue
+            published[key] = value
+            changed.append(key)
+        return frozenset(changed)
+
+    def clear_changes(self) -> None:
+        """Aucun champ modifié tant que le cycle en cours n'a pas abouti."""
+        self._changed = {}
+
+    def has_changed(self, device_mac: str, keys: Iterable[str]) -> bool:
+        """Indique si l'un des champs a changé pour cet appareil au dernier cycle."""
+        if device_mac not in self._changed:
+            return False
+        changed = self._changed[device_mac]
+        return changed is None or not changed.isdisjoint(keys)
@@ -0,0 +1,120 @@
+"""File de commandes par appareil : regroupement des changements de paramètres."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from .const import COMMAND_DEBOUNCE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DeviceCommandQueue:
+    """Changements de paramètres en attente pour un appareil.
+
+    Les valeurs demandées pendant `delay` secondes sont fusionnées (la
+    dernière l'emporte) puis écrites en un seul envoi : un curseur déplacé ou
+    un mode changé juste après le seuil ne coûtent qu'une écriture. Les envois
+    d'un même appareil ne se chevauchent jamais.
+    """
+
+    __slots__ = (
+        "device_mac",
+        "delay",
+        "_write",
+        "_current",
+        "_after_write",
+        "_pending",
+        "_waiters",
+        "_timer",
+        "_tasks",
+        "_cancelled",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        device_mac: str,
+        write: Callable[[dict[str, Any]], Awaitable[bool]],
+        current: Callable[[str], Any],
+        after_write: Callable[[], Awaitable[None]] | None = None,
+        delay: float = COMMAND_DEBOUNCE,
+    ) -> None:
+        """Initialise la file.
+
+        `write` envoie un patch de valeurs internes, `current` donne la valeur
+        connue d'un champ et `after_write` est appelé une fois après chaque
+        envoi réussi (rafraîchissement des données).
+        """
+        self.device_mac = device_mac
+        self.delay = delay
+        self._write = write
+        self._current = current
+        self._after_write = after_write
+        self._pending: dict[str, Any] = {}
+        self._waiters: list[asyncio.Future[bool]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        # Envois démarrés, en cours ou en attente du verrou
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._cancelled = False
+        self._lock = asyncio.Lock()
+
+    async def async_set(self, **values: Any) -> bool:
+        """Ajoute des valeurs à l'envoi en cours de préparation et attend son résultat."""
+        loop = asyncio.get_running_loop()
+        self._pending.update(values)
+        waiter: asyncio.Future[bool] = loop.create_future()
+        self._waiters.append(waiter)
+        # Chaque nouvelle valeur repousse l'envoi (anti-rebond)
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_later(self.delay, self._schedule_flush)
+        return await waiter
+
+    def _schedule_flush(self) -> None:
+        """Démarre l'envoi à l'expiration du délai."""
+        self._timer = None
+        task = asyncio.get_running_loop().create_task(self._async_flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _async_flush(self) -> None:
+        """Envoie les valeurs en attente et transmet le résultat aux appelants."""
+        async with self._lock:
+            values, self._pending = self._pending, {}
+            waiters, self._waiters = self._waiters, []
+            # Les valeurs déjà en place ne sont pas renvoyées
+            patch = {key: value for key, value in values.items() if self._current(key) != value}
+            success = not patch
+            try:
+                if patch:
+                    success = await self._write(patch)
+                else:
+                    _LOGGER.debug("ℹ️ Paramètres %s déjà en place pour %s", values, self.device_mac)
+            except Exception as err:  # noqa: BLE001 - transmis aux appelants
+                _LOGGER.error("❌ Erreur envoi des commandes pour %s: %s", self.device_mac, err)
+                success = False
+            finally:
+                # Appelants libérés même si l'envoi est annulé (déchargement)
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(success)
+        if patch and success and not self._cancelled and self._after_write is not None:
+            await self._after_write()
+
+    def cancel(self) -> None:
+        """Abandonne les valeurs en attente et l'envoi en cours (appareil retiré, déchargement)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._cancelled = True
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+        self._pending.clear()
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(False)
+        self._waiters.clear()
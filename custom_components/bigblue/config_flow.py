@@ -7,14 +7,48 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
-
-from .const import DOMAIN
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.selector import SelectSelector, SelectSelectorConfig
+
+from .const import (
+    CONF_DEVICE_TIMEOUT,
+    CONF_DISCOVERY_INTERVAL,
+    CONF_HOST,
+    CONF_MAX_CONCURRENCY,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_PORT,
+    CONF_SETTINGS_INTERVAL,
+    CONF_TRANSPORT,
+    CONF_UNIT_ID,
+    DEFAULT_DEVICE_TIMEOUT,
+    DEFAULT_DISCOVERY_INTERVAL,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_PORT,
+    DEFAULT_SETTINGS_INTERVAL,
+    DEFAULT_UNIT_ID,
+    DOMAIN,
+    TRANSPORT_CLOUD,
+    TRANSPORT_LOCAL,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+STEP_TRANSPORT_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_TRANSPORT, default=TRANSPORT_CLOUD): SelectSelector(
+            SelectSelectorConfig(
+                options=[TRANSPORT_CLOUD, TRANSPORT_LOCAL], translation_key=CONF_TRANSPORT
+            )
+        ),
+    }
+)
+
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
         vol.Required("email"): str,
@@ -22,19 +56,73 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
     }
 )
 
+STEP_LOCAL_DATA_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_HOST): str,
+        vol.Required(CONF_PORT, default=DEFAULT_PORT): vol.All(vol.Coerce(int), vol.Range(min=1, max=65535)),
+        vol.Required(CONF_UNIT_ID, default=DEFAULT_UNIT_ID): vol.All(vol.Coerce(int), vol.Range(min=0, max=247)),
+    }
+)
+
+
+def _options_schema(options: dict[str, Any], local: bool) -> vol.Schema:
+    """Options de l'entrée, pré-remplies avec les valeurs actuelles.
+
+    En Modbus local, les intervalles de télémétrie sont fixes et il n'y a ni
+    paramètres ni liste d'appareils à interroger : seul le délai s'applique.
+    """
+    def _field(key: str, default: int, minimum: int, maximum: int) -> tuple:
+        return (
+            vol.Required(key, default=options.get(key, default)),
+            vol.All(vol.Coerce(int), vol.Range(min=minimum, max=maximum)),
+        )
+
+    fields = [_field(CONF_DEVICE_TIMEOUT, DEFAULT_DEVICE_TIMEOUT, 1, 120)]
+    if not local:
+        fields = [
+            _field(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY, 1, 32),
+            *fields,
+            _field(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL, 5, 3600),
+            _field(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL, 5, 3600),
+            _field(CONF_SETTINGS_INTERVAL, DEFAULT_SETTINGS_INTERVAL, 60, 86400),
+            _field(CONF_DISCOVERY_INTERVAL, DEFAULT_DISCOVERY_INTERVAL, 300, 86400),
+        ]
+    return vol.Schema(dict(fields))
+
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Big Blue."""
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
-        """Handle the initial step."""
+        """Handle the initial step: cloud or local transport."""
+        if user_input is None:
+            return self.async_show_form(
+                step_id="user", data_schema=STEP_TRANSPORT_SCHEMA
+            )
+
+        if user_input[CONF_TRANSPORT] == TRANSPORT_LOCAL:
+            return await self.async_step_local()
+        return await self.async_step_cloud()
+
+    async def async_step_cloud(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle the Powafree account step."""
         if user_input is None:
             return self.async_show_form(
-                step_id="user", data_schema=STEP_USER_DATA_SCHEMA
+                step_id="cloud", data_schema=STEP_USER_DATA_SCHEMA
             )
 
         errors = {}
@@ -50,20 +138,58 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if not errors:
             return self.async_create_entry(
-                title=f"Big Blue {user_input['email']}", data=user_input
+                title=f"Big Blue {user_input['email']}",
+                data={**user_input, CONF_TRANSPORT: TRANSPORT_CLOUD},
+            )
+
+        return self.async_show_form(
+            step_id="cloud", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
+        )
+
+    async def async_step_local(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle the local Modbus TCP step."""
+        if user_input is None:
+            return self.async_show_form(
+                step_id="local", data_schema=STEP_LOCAL_DATA_SCHEMA
+            )
+
+        # Une entrée par batterie (hôte, port et unité)
+        await self.async_set_unique_id(
+            f"{user_input[CONF_HOST]}:{user_input[CONF_PORT]}/{user_input[CONF_UNIT_ID]}"
+        )
+        self._abort_if_unique_id_configured()
+
+        errors = {}
+
+        try:
+            await self._test_local_connection(user_input)
+        except CannotConnect:
+            errors["base"] = "cannot_connect"
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Unexpected exception")
+            errors["base"] = "unknown"
+
+        if not errors:
+            return self.async_create_entry(
+                title=f"Big Blue {user_input[CONF_HOST]}",
+                data={**user_input, CONF_TRANSPORT: TRANSPORT_LOCAL},
             )
 
         return self.async_show_form(
-            step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
+            step_id="local", data_schema=STEP_LOCAL_DATA_SCHEMA, errors=errors
         )
 
     async def _test_connection(self, user_input: dict[str, Any]) -> None:
         """Test connection to Powafree API."""
-        from .coordinator import BigBlueAPIClient
+        from .api import BigBlueAPIClient
         
+        # Session partagée de Home Assistant : rien à créer ni à fermer ici
         async with BigBlueAPIClient(
             user_input["email"], 
-            user_input["password"]
+            user_input["password"],
+            session=async_get_clientsession(self.hass),
         ) as api_client:
             if not await api_client.authenticate():
                 raise CannotConnect("Authentication failed")
@@ -73,5 +199,47 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 raise CannotConnect("No devices found")
 
 
+    async def _test_local_connection(self, user_input: dict[str, Any]) -> None:
+        """Test a Modbus TCP read on the local network."""
+        from .modbus import BigBlueModbusClient
+
+        async with BigBlueModbusClient(
+            user_input[CONF_HOST], user_input[CONF_PORT], user_input[CONF_UNIT_ID]
+        ) as modbus_client:
+            if not await modbus_client.authenticate():
+                raise CannotConnect("Modbus read failed")
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle Big Blue options (polling and concurrency)."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        # Copies : `config_entry` est fourni par Home Assistant dans les versions récentes
+        self._options = dict(config_entry.options)
+        self._local = config_entry.data.get(CONF_TRANSPORT) == TRANSPORT_LOCAL
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        errors = {}
+
+        if user_input is not None:
+            if user_input.get(CONF_MIN_SCAN_INTERVAL, 0) > user_input.get(
+                CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL
+            ):
+                errors["base"] = "invalid_scan_interval"
+            else:
+                # L'entrée est rechargée par l'écouteur de mise à jour (__init__.py)
+                return self.async_create_entry(title="", data={**self._options, **user_input})
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=_options_schema(user_input or self._options, self._local),
+            errors=errors,
+        )
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
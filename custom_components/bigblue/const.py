@@ -5,11 +5,94 @@ DOMAIN = "bigblue"
 # API Configuration
 API_BASE_URL = "http://www.powafree.com"  # Using HTTP (port 80) instead of HTTPS (port 443)
 API_TIMEOUT = 30
+API_MAX_RETRIES = 2  # Nouvelles tentatives sur erreur réseau / HTTP 5xx
+API_RETRY_BACKOFF = 0.5  # Délai de base (secondes), doublé à chaque tentative
+API_RETRY_BACKOFF_MAX = 5  # Délai maximal (secondes) entre deux tentatives
+TOKEN_REFRESH_MARGIN = 300  # Renouvellement du jeton N secondes avant son expiration
+
+# Connexions HTTP (session dédiée à chaque entrée de configuration)
+MAX_CONNECTIONS_PER_HOST = 8
+KEEPALIVE_TIMEOUT = 60  # Secondes de maintien d'une connexion inactive
+DNS_CACHE_TTL = 300  # Secondes
+
+# Polling configuration
+CONF_MAX_CONCURRENCY = "max_concurrency"
+CONF_DEVICE_TIMEOUT = "device_timeout"
+DEFAULT_MAX_CONCURRENCY = 4  # Nombre maximal d'appareils interrogés en parallèle
+DEFAULT_DEVICE_TIMEOUT = 20  # Délai maximal (secondes) pour récupérer un appareil
+CONF_SETTINGS_INTERVAL = "settings_interval"
+CONF_DISCOVERY_INTERVAL = "discovery_interval"
+DEFAULT_SCAN_INTERVAL = 30  # Télémétrie (/api/devices/last_data), en secondes
+DEFAULT_SETTINGS_INTERVAL = 600  # Paramètres (/api/devices/setting/download), en secondes
+DEFAULT_DISCOVERY_INTERVAL = 3600  # Liste des appareils (/api/devices/list), en secondes
+
+# Quarantaine des appareils hors ligne / introuvables (secondes)
+OFFLINE_BACKOFF_BASE = 60
+OFFLINE_BACKOFF_MAX = 3600
+
+# Avertissements répétés : au plus un message par sujet et par période (secondes)
+LOG_THROTTLE_PERIOD = 900
+
+# Cache local (dernière liste d'appareils et dernières données connues)
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 60  # Secondes : regroupe les écritures sur disque
+
+# Historique haute résolution en mémoire : durée couverte, en secondes. Le
+# tampon d'un appareil est dimensionné pour l'intervalle minimal (1440 mesures
+# à 10 s en cloud, 28800 à 0,5 s en Modbus local, soit environ 2 Mo)
+HISTORY_WINDOW = 4 * 3600
+
+# Écart minimal (secondes) entre deux écritures d'état des capteurs de
+# diagnostic du hub : le cycle Modbus local dure une demi-seconde
+HUB_SENSOR_UPDATE_INTERVAL = 30
+
+# Indicateurs dérivés (autonomie, rendement, énergies intégrées)
+BATTERY_CHARGE_POSITIVE = True  # Signe de totalPower pendant la charge
+ANALYTICS_POWER_SMOOTHING = 0.3  # Coefficient de la moyenne exponentielle
+ANALYTICS_MAX_GAP = 900  # Secondes : au-delà, pas d'intégration entre deux mesures
+ANALYTICS_MIN_CHARGED = 0.1  # kWh chargés avant de publier le rendement
+
+# Écritures de paramètres : délai de regroupement des commandes (secondes)
+COMMAND_DEBOUNCE = 0.5
+
+# Intervalle adaptatif (bornes en secondes)
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+DEFAULT_MIN_SCAN_INTERVAL = 10
+DEFAULT_MAX_SCAN_INTERVAL = 300
+# Variations considérées comme "actives" entre deux cycles
+ACTIVITY_POWER_STEP = 100  # W
+ACTIVITY_SOC_STEP = 1  # %
+ACTIVITY_PV_STEP = 100  # W
+
+# Zones mortes par type de mesure : variation minimale pour publier un nouvel
+# état (les autres champs sont publiés dès qu'ils changent)
+DEADBANDS = {
+    "power": 5.0,  # W
+    "voltage": 0.2,  # V
+    "temperature": 0.2,  # °C
+}
+
+# Transport : cloud Powafree ou Modbus TCP local
+CONF_TRANSPORT = "transport"
+CONF_HOST = "host"
+CONF_PORT = "port"
+CONF_UNIT_ID = "unit_id"
+TRANSPORT_CLOUD = "cloud"
+TRANSPORT_LOCAL = "local"
 
 # Default values
 DEFAULT_PORT = 502
 DEFAULT_UNIT_ID = 1
 
+# Modbus TCP local
+MODBUS_TIMEOUT = 3  # Secondes par transaction
+MODBUS_RETRIES = 1  # Nouvelle tentative après reconnexion
+MODBUS_MAX_REGISTERS = 125  # Registres au plus par lecture (limite du protocole)
+MODBUS_MAX_GAP = 8  # Registres inutilisés tolérés pour fusionner deux lectures
+DEFAULT_LOCAL_SCAN_INTERVAL = 0.5  # Secondes
+DEFAULT_LOCAL_MAX_SCAN_INTERVAL = 5  # Secondes
+
 # Modbus registers for Big Blue battery
 # These will need to be updated based on actual Big Blue documentation
 REGISTER_BATTERY_VOLTAGE = 0x1000
@@ -3,12 +3,46 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import math
+import time
+from collections.abc import Callable
 from datetime import timedelta
+from typing import Any
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .const import DOMAIN, API_BASE_URL, API_TIMEOUT
+from .api import (
+    BigBlueAPIClient,
+    BigBlueApiError,
+    BigBlueDeviceOfflineError,
+    BigBlueRecordNotFoundError,
+    BigBlueSettingsConflictError,
+)
+from .const import (
+    DOMAIN,
+    DEFAULT_DEVICE_TIMEOUT,
+    DEFAULT_DISCOVERY_INTERVAL,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SETTINGS_INTERVAL,
+    HISTORY_WINDOW,
+    STORAGE_SAVE_DELAY,
+)
+from .analytics import DERIVED_DEADBANDS, EnergyAnalytics
+from .changes import ChangeTracker
+from .commands import DeviceCommandQueue
+from .fields import FIELD_DEADBANDS, decode_settings, encode_settings
+from .health import STATE_MISSING, STATE_OFFLINE, DeviceHealth
+from .history import TelemetryRingBuffer
+from .metrics import BigBlueMetrics
+from .scheduler import AdaptivePollScheduler
+from .snapshot import DeviceSnapshot
+from .throttle import LogThrottle
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -16,736 +50,611 @@ _LOGGER = logging.getLogger(__name__)
 class BigBlueDataUpdateCoordinator(DataUpdateCoordinator):
     """Coordinateur pour les données Big Blue."""
     
-    def __init__(self, hass: HomeAssistant, api_client) -> None:
-        """Initialise le coordinateur."""
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api_client: BigBlueAPIClient,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        device_timeout: float = DEFAULT_DEVICE_TIMEOUT,
+        settings_interval: float = DEFAULT_SETTINGS_INTERVAL,
+        min_scan_interval: float = DEFAULT_MIN_SCAN_INTERVAL,
+        max_scan_interval: float = DEFAULT_MAX_SCAN_INTERVAL,
+        store: Store | None = None,
+        discovery_interval: float = DEFAULT_DISCOVERY_INTERVAL,
+        entry_id: str | None = None,
+        scan_interval: float = DEFAULT_SCAN_INTERVAL,
+    ) -> None:
+        """Initialise le coordinateur.
+
+        `api_client` est le client cloud (BigBlueAPIClient) ou local
+        (modbus.BigBlueModbusClient), qui partagent la même interface.
+        """
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=30),
+            update_interval=timedelta(seconds=scan_interval),
         )
         self.api_client = api_client
+        # Compteurs et latences par endpoint, durée des cycles
+        self.metrics = BigBlueMetrics()
+        api_client.add_request_listener(self.metrics.record_request)
         self.devices = []  # Liste des appareils trouvés
+        self.device_timeout = device_timeout
+        # Limite le nombre d'appareils interrogés simultanément
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Les paramètres changent rarement : ils sont rafraîchis sur un rythme
+        # plus lent que la télémétrie, ou immédiatement après nos écritures
+        self.settings_interval = settings_interval
+        self._settings_cache: dict[str, dict] = {}
+        self._settings_fetched_at: dict[str, float] = {}
+        # Une seule écriture de paramètres à la fois par appareil
+        self._settings_locks: dict[str, asyncio.Lock] = {}
+        # Changements de paramètres regroupés avant envoi (curseurs, modes)
+        self._command_queues: dict[str, DeviceCommandQueue] = {}
+        # Paramètres affichés avant confirmation, par appareil
+        self._optimistic: dict[str, dict[str, Any]] = {}
+        # Entités de chaque appareil, notifiées seules lors d'un rafraîchissement ciblé
+        self._device_listeners: dict[str, list[CALLBACK_TYPE]] = {}
+        # Intervalle de mise à jour adapté à l'activité PV / batterie
+        self.scheduler = AdaptivePollScheduler(
+            scan_interval, min_scan_interval, max_scan_interval
+        )
+        # Cache persistant pour un démarrage sans attendre le cloud
+        self._store = store
+        # Redécouverte périodique de la liste des appareils du compte
+        self.entry_id = entry_id
+        self.discovery_interval = discovery_interval
+        self._devices_fetched_at: float | None = None
+        # État de santé par appareil (quarantaine des appareils hors ligne)
+        self.health: dict[str, DeviceHealth] = {}
+        # Un instantané par appareil, mis à jour sur place à chaque cycle
+        self._snapshots: dict[str, DeviceSnapshot] = {}
+        # Dernières mesures de chaque appareil à pleine résolution
+        self.history: dict[str, TelemetryRingBuffer] = {}
+        # Autonomie, rendement et énergies calculés à chaque mesure
+        self.analytics: dict[str, EnergyAnalytics] = {}
+        # Détection des changements (zones mortes par type de mesure)
+        self.changes = ChangeTracker({**FIELD_DEADBANDS, **DERIVED_DEADBANDS})
+        # DeviceInfo partagé par les entités d'une même batterie
+        self._device_infos: dict[str, dr.DeviceInfo] = {}
+        # Avertissements répétés (délais, quarantaines) limités
+        self._log_throttle = LogThrottle(_LOGGER)
     
-    async def _async_update_data(self):
-        """Met à jour les données pour tous les appareils."""
-        try:
-            # S'assurer que l'authentification est faite
-            if not self.api_client.token or not self.api_client.user_id:
-                _LOGGER.info("🔐 Authentification nécessaire...")
-                auth_success = await self.api_client.authenticate()
-                if not auth_success:
-                    raise UpdateFailed("Échec de l'authentification")
-
-            # Récupération des appareils (une seule fois)
-            if not self.devices:
-                _LOGGER.info("📋 Récupération des appareils...")
-                devices = await self.api_client.get_devices()
-                if not devices:
-                    raise UpdateFailed("Aucun appareil trouvé")
-                self.devices = devices
-                _LOGGER.info(f"📱 {len(devices)} appareil(s) trouvé(s)")
-
-            # Récupération des données pour chaque appareil
-            all_devices_data = {}
-            
-            for device in self.devices:
-                device_mac = device.get("bleMac")
-                device_name = device.get("name", f"Big Blue {device_mac}")
-                
-                _LOGGER.info(f"📊 Récupération des données pour {device_name}...")
-                
-                # Récupération des données de cet appareil
-                data = await self.api_client.get_device_data_for_mac(device_mac)
-                
-                if data:
-                    # Formatage des données pour cet appareil
-                    formatted_data = {
-                        "soc": data.get("totalSoc", 0) / 10,  # Conversion en %
-                        "soh": data.get("totalSoh", 0) / 10,  # Conversion en %
-                        "voltage": data.get("totalVoltage", 0) / 10,  # Conversion en V
-                        "current": data.get("totalCurrent", 0),
-                        "power": data.get("totalPower", 0) / 10,  # Conversion en W
-                        "remaining_capacity": data.get("totalRemainingCapacity", 0) / 1000,  # Conversion en kWh
-                        "rated_capacity": data.get("TotalRatedCapacity", 0) / 1000,  # Conversion en kWh
-                        "pv1_voltage": data.get("pv1V", 0) / 10,  # Conversion en V
-                        "pv1_current": data.get("pv1A", 0),
-                        "pv1_power": data.get("pv1W", 0) / 10,  # Conversion en W
-                        "pv2_voltage": data.get("pv2V", 0) / 10,  # Conversion en V
-                        "pv2_current": data.get("pv2A", 0),
-                        "pv2_power": data.get("pv2W", 0) / 10,  # Conversion en W
-                        "pv_total_power": data.get("pvTotalPower", 0) / 10,  # Conversion en W
-                        "daily_generation": data.get("dailyGeneration", 0) / 1000,  # Conversion en kWh
-                        "total_generation": data.get("totalGeneration", 0) / 1000,  # Conversion en kWh
-                        "daily_output_energy": data.get("dailyOutputEnergy", 0) / 1000,  # Conversion en kWh
-                        "total_output_energy": data.get("totalOutputEnergy", 0) / 1000,  # Conversion en kWh
-                        "max_temperature": data.get("maxTemperature", 0) / 10,  # Conversion en °C
-                        "min_temperature": data.get("minTemperature", 0) / 10,  # Conversion en °C
-                        "daily_co2_savings": data.get("dailyCo2Savings", 0),
-                        "daily_runtime": data.get("dailyRuntime", 0) / 3600,  # Conversion en heures
-                        "total_runtime": data.get("totalRuntime", 0),
-                        "battery_count": data.get("batteryCount", 0),
-                        "status": data.get("status", 0),
-                        "current_mode": await self.api_client.get_current_mode(device_mac),  # Récupération du mode actuel
-                        "discharge_threshold": await self.api_client.get_discharge_threshold(device_mac),  # Récupération du seuil de décharge
-                        "last_update": data.get("last_update"),
-                        "device_mac": device_mac,
-                        "device_name": device_name,
-                    }
-                    
-                    all_devices_data[device_mac] = formatted_data
-                    
-                    _LOGGER.info(f"✅ Données mises à jour pour {device_name}: SOC={formatted_data.get('soc', 'N/A')}%, "
-                                f"Puissance PV={formatted_data.get('pv_total_power', 'N/A')}W")
-                else:
-                    _LOGGER.warning(f"⚠️ Aucune donnée pour {device_name} - Device ignoré (pas de données par défaut)")
-                    # Ne pas créer de données par défaut pour éviter les devices "default"
-            
-            return all_devices_data
-            
-        except Exception as err:
-            _LOGGER.error(f"❌ Erreur lors de la mise à jour des données: {err}")
-            raise UpdateFailed(f"Erreur API: {err}")
-
+    async def async_restore_cache(self) -> bool:
+        """Restaure les appareils et les dernières données connues depuis le cache local.
 
-class BigBlueAPIClient:
-    """Client API pour Powafree."""
+        Les données restaurées sont marquées `stale` jusqu'au premier
+        rafraîchissement réussi. Retourne False si aucun cache n'est disponible.
+        """
+        if self._store is None:
+            return False
+        
+        cached = await self._store.async_load()
+        if not cached or not cached.get("devices") or not cached.get("data"):
+            return False
+        
+        self.devices = cached["devices"]
+        self._snapshots = {
+            device_mac: DeviceSnapshot.from_dict({
+                "device_mac": device_mac,
+                "device_name": f"Big Blue {device_mac}",
+                **device_data,
+                "stale": True,
+            })
+            for device_mac, device_data in cached["data"].items()
+        }
+        self.data = dict(self._snapshots)
+        _LOGGER.info("💾 %d appareil(s) restauré(s) depuis le cache local", len(self.data))
+        return True
     
-    def __init__(self, email: str, password: str):
-        """Initialise le client API."""
-        self.email = email
-        self.password = password
-        self.base_url = API_BASE_URL
-        self.token = None
-        self.user_id = None
-        self.device_mac = None
-        self.session = None
+    def _cache_payload(self) -> dict:
+        """Contenu sauvegardé dans le cache local."""
+        return {
+            "devices": self.devices,
+            "data": {
+                device_mac: snapshot.as_dict()
+                for device_mac, snapshot in (self.data or {}).items()
+            },
+        }
     
-    async def __aenter__(self):
-        """Context manager entry."""
-        import aiohttp
-        self.session = aiohttp.ClientSession()
-        return self
+    def invalidate_settings(self, device_mac: str | None = None) -> None:
+        """Force le rechargement des paramètres au prochain cycle (tous si MAC absent)."""
+        if device_mac is None:
+            self._settings_fetched_at.clear()
+        else:
+            self._settings_fetched_at.pop(device_mac, None)
     
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit."""
-        if self.session:
-            await self.session.close()
+    async def _async_get_settings(self, device_mac: str) -> dict:
+        """Retourne les paramètres d'un appareil, téléchargés seulement s'ils sont périmés."""
+        fetched_at = self._settings_fetched_at.get(device_mac)
+        if fetched_at is not None and time.monotonic() - fetched_at < self.settings_interval:
+            return self._settings_cache.get(device_mac, {})
+        
+        settings = await self.api_client.get_device_settings(device_mac)
+        if settings:
+            self._store_settings(device_mac, settings)
+            return settings
+        
+        # En cas d'échec, on conserve les derniers paramètres connus
+        return self._settings_cache.get(device_mac, {})
     
-    async def authenticate(self) -> bool:
-        """Authentification sur l'API Powafree."""
-        try:
-            # Initialiser la session si nécessaire
-            if not self.session:
-                import aiohttp
-                self.session = aiohttp.ClientSession()
-            
-            login_data = {
-                "email": self.email,
-                "password": self.password
-            }
-            
-            headers = {
-                "Accept": "application/json",
-                "Accept-Language": "fr",
-                "Content-Type": "application/json",
-                "User-Agent": "okhttp/3.14.9"
-            }
-            
-            _LOGGER.info(f"🔐 Tentative de connexion à {self.base_url}/api/user/login/email")
-            _LOGGER.debug(f"Headers: {headers}")
-            _LOGGER.debug(f"Email: {self.email}")
-            
-            async with self.session.post(
-                f"{self.base_url}/api/user/login/email",
-                json=login_data,
-                headers=headers
-            ) as response:
-                
-                _LOGGER.info(f"📥 Réponse reçue: HTTP {response.status}")
-                
-                if response.status == 200:
-                    data = await response.json()
-                    _LOGGER.debug(f"Données de réponse: {data}")
-                    
-                    if data.get("code") == 0:
-                        user_data = data["data"]
-                        self.token = user_data["token"]
-                        self.user_id = user_data["userId"]
-                        
-                        _LOGGER.info(f"✅ Authentification réussie pour {user_data.get('name', 'N/A')}")
-                        _LOGGER.info(f"User ID: {self.user_id}")
-                        _LOGGER.info(f"Token: {self.token[:20]}...")
-                        return True
-                    else:
-                        _LOGGER.error(f"❌ Erreur d'authentification: {data.get('message')}")
-                        _LOGGER.error(f"Code d'erreur: {data.get('code')}")
-                        return False
-                else:
-                    response_text = await response.text()
-                    _LOGGER.error(f"❌ Erreur HTTP: {response.status}")
-                    _LOGGER.error(f"Réponse: {response_text[:200]}...")
-                    return False
-                    
-        except Exception as e:
-            _LOGGER.error(f"❌ Erreur de connexion: {e}")
-            _LOGGER.error(f"Type d'erreur: {type(e).__name__}")
-            _LOGGER.error(f"URL tentée: {self.base_url}/api/user/login/email")
-            return False
+    def _store_settings(self, device_mac: str, settings: dict) -> None:
+        """Enregistre des paramètres frais dans le cache."""
+        self._settings_cache[device_mac] = settings
+        self._settings_fetched_at[device_mac] = time.monotonic()
     
-    async def get_devices(self) -> list:
-        """Récupère la liste des appareils."""
-        if not self.token or not self.user_id:
-            _LOGGER.error("Token ou User ID manquant pour get_devices")
-            return []
-        
-        try:
-            # Initialiser la session si nécessaire
-            if not self.session:
-                import aiohttp
-                self.session = aiohttp.ClientSession()
-            
-            headers = {
-                "Accept": "application/json",
-                "Accept-Language": "fr",
-                "Authorization": self.token,
-                "Content-Type": "application/json",
-                "User-Agent": "okhttp/3.14.9"
-            }
-            
-            data = {"userId": self.user_id}
-            
-            _LOGGER.info(f"📋 Récupération des appareils depuis {self.base_url}/api/devices/list")
-            _LOGGER.debug(f"User ID: {self.user_id}")
-            
-            async with self.session.post(
-                f"{self.base_url}/api/devices/list",
-                json=data,
-                headers=headers
-            ) as response:
-                
-                if response.status == 200:
-                    response_data = await response.json()
-                    
-                    if response_data.get("code") == 0:
-                        devices = response_data.get("data", [])
-                        if devices:
-                            self.device_mac = devices[0].get("bleMac")
-                            _LOGGER.info(f"Appareil trouvé: {devices[0].get('name', 'N/A')}")
-                        return devices
-                    else:
-                        _LOGGER.error(f"Erreur API: {response_data.get('message')}")
-                        return []
+    async def async_write_settings(self, device_mac: str, **values) -> bool:
+        """Modifie des paramètres par champ (`current_mode=2`) sans écraser les autres.
+
+        Le patch est fusionné sur les paramètres en cache (téléchargés seulement
+        s'ils sont périmés) et envoyé en une requête ; les paramètres relus
+        après l'envoi remplacent le cache, le prochain cycle n'a donc pas à les
+        retélécharger. Retourne False en cas d'échec ou de conflit.
+        """
+        patch = encode_settings(values)
+        lock = self._settings_locks.setdefault(device_mac, asyncio.Lock())
+        async with lock:
+            settings = await self._async_get_settings(device_mac)
+            try:
+                current = await self.api_client.async_patch_settings(device_mac, patch, settings)
+            except BigBlueSettingsConflictError as err:
+                # Un autre client a modifié l'appareil : le cache suit les valeurs relues
+                if err.settings:
+                    self._store_settings(device_mac, err.settings)
                 else:
-                    _LOGGER.error(f"Erreur HTTP: {response.status}")
-                    return []
-                    
-        except Exception as e:
-            _LOGGER.error(f"❌ Erreur récupération appareils: {e}")
-            _LOGGER.error(f"Type d'erreur: {type(e).__name__}")
-            return []
+                    self.invalidate_settings(device_mac)
+                _LOGGER.warning("⚠️ Conflit d'écriture des paramètres: %s", err)
+                return False
+            except BigBlueApiError as err:
+                self.invalidate_settings(device_mac)
+                _LOGGER.error("❌ Erreur écriture des paramètres pour %s: %s", device_mac, err)
+                return False
+            self._store_settings(device_mac, current)
+        _LOGGER.debug("✅ Paramètres %s écrits pour %s", patch, device_mac)
+        return True
     
-    async def get_device_data(self) -> dict:
-        """Récupère les données de l'appareil."""
-        if not self.token or not self.user_id or not self.device_mac:
-            _LOGGER.error("Token, User ID ou Device MAC manquant pour get_device_data")
-            return {}
-        
-        try:
-            # Initialiser la session si nécessaire
-            if not self.session:
-                import aiohttp
-                self.session = aiohttp.ClientSession()
-            
-            headers = {
-                "Accept": "application/json",
-                "Accept-Language": "fr",
-                "Authorization": self.token,
-                "Content-Type": "application/json",
-                "User-Agent": "okhttp/3.14.9"
-            }
-            
-            data = {
-                "userId": self.user_id,
-                "bleMac": self.device_mac
-            }
-            
-            _LOGGER.info(f"📊 Récupération des données depuis {self.base_url}/api/devices/last_data")
-            _LOGGER.debug(f"User ID: {self.user_id}, Device MAC: {self.device_mac}")
-            
-            # Récupération des données en temps réel
-            async with self.session.post(
-                f"{self.base_url}/api/devices/last_data",
-                json=data,
-                headers=headers
-            ) as response:
-                
-                _LOGGER.info(f"📥 Réponse données: HTTP {response.status}")
-                
-                if response.status == 200:
-                    response_data = await response.json()
-                    _LOGGER.debug(f"Données brutes: {response_data}")
-                    
-                    if response_data.get("code") == 0:
-                        device_data = response_data.get("data", {})
-                        device_data["last_update"] = asyncio.get_event_loop().time()
-                        
-                        # Conversion des valeurs si nécessaire
-                        if "totalSoc" in device_data:
-                            device_data["totalSoc"] = device_data["totalSoc"] / 10  # Conversion en %
-                        if "totalSoh" in device_data:
-                            device_data["totalSoh"] = device_data["totalSoh"] / 10  # Conversion en %
-                        if "maxTemperature" in device_data:
-                            device_data["maxTemperature"] = device_data["maxTemperature"] / 10  # Conversion en °C
-                        if "minTemperature" in device_data:
-                            device_data["minTemperature"] = device_data["minTemperature"] / 10  # Conversion en °C
-                        
-                        _LOGGER.info(f"✅ Données récupérées: SOC={device_data.get('totalSoc', 'N/A')}%, "
-                                   f"Puissance PV={device_data.get('pvTotalPower', 'N/A')}W, "
-                                   f"Production journalière={device_data.get('dailyGeneration', 'N/A')}Wh")
-                        
-                        return device_data
-                    else:
-                        _LOGGER.error(f"❌ Erreur API: {response_data.get('message')}")
-                        _LOGGER.error(f"Code d'erreur: {response_data.get('code')}")
-                        return {}
-                else:
-                    response_text = await response.text()
-                    _LOGGER.error(f"❌ Erreur HTTP: {response.status}")
-                    _LOGGER.error(f"Réponse: {response_text[:200]}...")
-                    return {}
-                    
-        except Exception as e:
-            _LOGGER.error(f"❌ Erreur récupération données: {e}")
-            _LOGGER.error(f"Type d'erreur: {type(e).__name__}")
-            return {}
+    def command_queue(self, device_mac: str) -> DeviceCommandQueue:
+        """File de commandes d'un appareil, créée à la première écriture."""
+        queue = self._command_queues.get(device_mac)
+        if queue is None:
+            queue = self._command_queues[device_mac] = DeviceCommandQueue(
+                device_mac,
+                lambda values: self.async_write_settings(device_mac, **values),
+                # Comparaison aux paramètres confirmés, pas à l'instantané qui
+                # affiche déjà les valeurs attendues (voir async_set_settings)
+                lambda key: self._confirmed_settings(device_mac).get(key),
+                # Les paramètres relus après l'envoi sont en cache : une écriture
+                # coûte l'envoi et la relecture (2 requêtes), ce rafraîchissement aucune
+                lambda: self.async_refresh_device(device_mac, telemetry=False),
+            )
+        return queue
+    
+    @callback
+    def async_cancel_commands(self) -> None:
+        """Abandonne les commandes en attente de tous les appareils (déchargement de l'entrée)."""
+        for queue in self._command_queues.values():
+            queue.cancel()
+        self._command_queues.clear()
     
-    async def get_device_data_for_mac(self, device_mac: str) -> dict:
-        """Récupère les données d'un appareil spécifique par son MAC."""
-        if not self.token or not self.user_id or not device_mac:
-            _LOGGER.error("Token, User ID ou Device MAC manquant pour get_device_data_for_mac")
-            return {}
+    def _confirmed_settings(self, device_mac: str) -> dict[str, Any]:
+        """Valeurs issues des derniers paramètres lus sur l'appareil (vide si inconnus)."""
+        settings = self._settings_cache.get(device_mac)
+        return decode_settings(settings) if settings else {}
+    
+    async def async_set_settings(self, device_mac: str, **values) -> bool:
+        """Change des paramètres en affichant immédiatement les valeurs attendues.
+
+        Les valeurs sont appliquées à l'instantané et publiées sans attendre
+        l'appareil, puis envoyées via la file de commandes. Elles restent
+        affichées jusqu'à la relecture qui suit l'envoi : si l'appareil ne les
+        a pas appliquées, l'instantané revient aux derniers paramètres connus.
+        """
+        snapshot = self._snapshots.get(device_mac)
+        previous = {key: getattr(snapshot, key) for key in values} if snapshot else {}
+        self._optimistic.setdefault(device_mac, {}).update(values)
+        if snapshot is not None and snapshot.apply_values(values):
+            self._async_publish_device(device_mac)
         
-        try:
-            # Initialiser la session si nécessaire
-            if not self.session:
-                import aiohttp
-                self.session = aiohttp.ClientSession()
-            
-            headers = {
-                "Accept": "application/json",
-                "Accept-Language": "fr",
-                "Authorization": self.token,
-                "Content-Type": "application/json",
-                "User-Agent": "okhttp/3.14.9"
-            }
-            
-            data = {
-                "userId": self.user_id,
-                "bleMac": device_mac
-            }
-            
-            _LOGGER.info(f"📊 Récupération des données pour {device_mac} depuis {self.base_url}/api/devices/last_data")
-            
-            # Récupération des données en temps réel
-            async with self.session.post(
-                f"{self.base_url}/api/devices/last_data",
-                json=data,
-                headers=headers
-            ) as response:
-                
-                _LOGGER.info(f"📥 Réponse données pour {device_mac}: HTTP {response.status}")
-                
-                if response.status == 200:
-                    response_data = await response.json()
-                    
-                    if response_data.get("code") == 0:
-                        device_data = response_data.get("data", {})
-                        device_data["last_update"] = asyncio.get_event_loop().time()
-                        
-                        # Les valeurs sont déjà dans le bon format depuis l'API
-                        
-                        _LOGGER.info(f"✅ Données récupérées pour {device_mac}: SOC={device_data.get('totalSoc', 'N/A')/10:.1f}%, "
-                                    f"Puissance PV={device_data.get('pvTotalPower', 'N/A')}W")
-                        
-                        return device_data
-                    else:
-                        # Gestion des erreurs d'authentification
-                        if response_data.get("code") == 1009:  # Invalid token
-                            _LOGGER.warning(f"🔄 Token expiré pour {device_mac}, tentative de renouvellement...")
-                            auth_success = await self.authenticate()
-                            if auth_success:
-                                _LOGGER.info(f"✅ Token renouvelé, nouvelle tentative pour {device_mac}")
-                                # Retry avec le nouveau token
-                                headers["Authorization"] = self.token
-                                async with self.session.post(
-                                    f"{self.base_url}/api/devices/last_data",
-                                    json=data,
-                                    headers=headers
-                                ) as retry_response:
-                                    if retry_response.status == 200:
-                                        retry_data = await retry_response.json()
-                                        if retry_data.get("code") == 0:
-                                            device_data = retry_data.get("data", {})
-                                            device_data["last_update"] = asyncio.get_event_loop().time()
-                                            _LOGGER.info(f"✅ Données récupérées après renouvellement: SOC={device_data.get('totalSoc', 'N/A')/10:.1f}%")
-                                            return device_data
-                            else:
-                                _LOGGER.error(f"❌ Échec du renouvellement du token pour {device_mac}")
-                                return {}
-                        else:
-                            error_message = response_data.get('message', 'Erreur inconnue')
-                            error_code = response_data.get('code', 'N/A')
-                            
-                            # Gestion spécifique des erreurs
-                            if error_code == 1013:  # Record not found (code réel de l'API)
-                                _LOGGER.warning(f"⚠️ Device {device_mac} non trouvé dans l'API (Record not found)")
-                                return {}
-                            elif error_code == 1002:  # Device offline
-                                _LOGGER.warning(f"⚠️ Device {device_mac} hors ligne")
-                                return {}
-                            else:
-                                _LOGGER.error(f"❌ Erreur API pour {device_mac}: {error_message} (Code: {error_code})")
-                                return {}
-                else:
-                    response_text = await response.text()
-                    _LOGGER.error(f"❌ Erreur HTTP pour {device_mac}: {response.status}")
-                    return {}
-                    
-        except Exception as e:
-            _LOGGER.error(f"❌ Erreur récupération données pour {device_mac}: {e}")
-            return {}
+        success = await self.command_queue(device_mac).async_set(**values)
+        
+        # Une demande plus récente sur le même champ reste en attente
+        pending = self._optimistic.get(device_mac, {})
+        for key, value in values.items():
+            if pending.get(key) == value:
+                del pending[key]
+        if not pending:
+            self._optimistic.pop(device_mac, None)
+        
+        if not success and snapshot is not None:
+            known = self._confirmed_settings(device_mac) or previous
+            rollback = {key: known[key] for key in values if key not in pending}
+            _LOGGER.warning(
+                "⚠️ %s: valeurs %s non appliquées par l'appareil, retour à %s",
+                snapshot.device_name,
+                values,
+                rollback,
+            )
+            if snapshot.apply_values(rollback):
+                self._async_publish_device(device_mac)
+        return success
     
-    async def set_device_mode(self, device_mac: str, mode: int) -> bool:
-        """Change le mode de fonctionnement d'un appareil."""
-        if not self.token or not self.user_id or not device_mac:
-            _LOGGER.error("Token, User ID ou Device MAC manquant pour set_device_mode")
+    async def async_refresh_device(
+        self,
+        device_mac: str,
+        *,
+        telemetry: bool = True,
+        settings: bool = False,
+    ) -> bool:
+        """Rafraîchit un seul appareil et ne notifie que ses entités.
+
+        `telemetry` relit les dernières mesures (paramètres selon le cache),
+        `settings` force le téléchargement des paramètres. Après une écriture,
+        les paramètres relus sont déjà en cache : `telemetry=False` suffit et
+        ne coûte aucune requête. Retourne False si l'appareil n'a pas été lu.
+        """
+        device = next((item for item in self.devices if item.get("bleMac") == device_mac), None)
+        if device is None:
             return False
+        if settings:
+            self.invalidate_settings(device_mac)
         
-        try:
-            # Initialiser la session si nécessaire
-            if not self.session:
-                import aiohttp
-                self.session = aiohttp.ClientSession()
-            
-            headers = {
-                "Accept": "application/json",
-                "Accept-Language": "fr",
-                "Authorization": self.token,
-                "Content-Type": "application/json",
-                "User-Agent": "okhttp/3.14.9"
-            }
-            
-            # Données pour changer le mode
-            data = {
-                "bleMac": device_mac,
-                "bmsEnable": True,
-                "bmsPower": 12,
-                "ctAPower": 0,
-                "ctBPower": 0,
-                "ctCPower": 0,
-                "ctEnable": 0,
-                "ctTotalPower": 0,
-                "currencyCode": "EUR",
-                "deviceControl": 0,
-                "gridCode": 0,
-                "gridControl": 0,
-                "gridEnable": 0,
-                "gridTime": 0,
-                "mode": mode,
-                "otaStatus": 1,
-                "peakShavingDetails": ["|00:00-23:59|4000|"],
-                "periodDetail": [
-                    ["|00:00-08:00|1500|", "|08:00-18:00|0|", "|18:00-22:00|3000|", "|22:00-23:59|1000|"],
-                    ["|00:00-08:00|1000|", "|08:00-18:00|0|", "|18:00-22:00|2000|", "|22:00-23:59|1500|"],
-                    ["|00:00-08:00|1500|", "|08:00-18:00|0|", "|18:00-22:00|2000|", "|22:00-23:59|1500|"],
-                    ["|00:00-08:00|1500|", "|08:00-18:00|0|", "|18:00-22:00|2000|", "|22:00-23:59|1500|"],
-                    ["|00:00-08:00|1500|", "|08:00-18:00|0|", "|18:00-22:00|2000|", "|22:00-23:59|3000|"],
-                    ["|00:00-08:00|1500|", "|08:00-18:00|0|", "|18:00-22:00|2000|", "|22:00-23:59|1500|"],
-                    ["|00:00-08:00|1500|", "|08:00-18:00|0|", "|18:00-22:00|2000|", "|22:00-23:59|1500|"]
-                ],
-                "periods": 0,
-                "pfSwitch": 0,
-                "pfValue": 0,
-                "pricePerKwh": 0.3,
-                "soc": 10,
-                "timezone": 2.0,
-                "userId": self.user_id
-            }
-            
-            _LOGGER.info(f"🔧 Changement du mode {mode} pour {device_mac}...")
-            
-            async with self.session.post(
-                f"{self.base_url}/api/devices/setting/upload",
-                json=data,
-                headers=headers
-            ) as response:
-                
-                _LOGGER.info(f"📥 Réponse changement mode: HTTP {response.status}")
-                
-                if response.status == 200:
-                    response_data = await response.json()
-                    
-                    if response_data.get("code") == 0:
-                        _LOGGER.info(f"✅ Mode {mode} activé avec succès pour {device_mac}")
-                        return True
-                    else:
-                        _LOGGER.error(f"❌ Erreur API changement mode: {response_data.get('message')}")
-                        return False
-                else:
-                    response_text = await response.text()
-                    _LOGGER.error(f"❌ Erreur HTTP changement mode: {response.status}")
-                    return False
-                    
-        except Exception as e:
-            _LOGGER.error(f"❌ Erreur changement mode pour {device_mac}: {e}")
+        if telemetry:
+            _, snapshot = await self._async_fetch_device(device)
+        else:
+            snapshot = self._snapshots.get(device_mac)
+            if snapshot is not None:
+                snapshot.update_settings(await self._async_get_settings(device_mac))
+                overrides = self._optimistic.get(device_mac)
+                if overrides:
+                    snapshot.apply_values(overrides)
+        if snapshot is None:
             return False
+        
+        if self.data is not None:
+            self.data[device_mac] = snapshot
+        self._async_publish_device(device_mac)
+        return not snapshot.offline
     
-    async def get_current_mode(self, device_mac: str) -> int:
-        """Récupère le mode actuel d'un appareil."""
-        if not self.token or not self.user_id or not device_mac:
-            _LOGGER.error("Token, User ID ou Device MAC manquant pour get_current_mode")
-            return 1  # Mode par défaut
+    @callback
+    def async_add_device_update_listener(
+        self, device_mac: str, update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Abonne une entité aux rafraîchissements ciblés de son appareil."""
+        listeners = self._device_listeners.setdefault(device_mac, [])
+        listeners.append(update_callback)
         
+        @callback
+        def _remove() -> None:
+            listeners.remove(update_callback)
+            if not listeners and self._device_listeners.get(device_mac) is listeners:
+                del self._device_listeners[device_mac]
+        
+        return _remove
+    
+    @callback
+    def _async_publish_device(self, device_mac: str) -> None:
+        """Publie l'instantané d'un appareil modifié hors cycle aux seules entités concernées."""
+        snapshot = self._snapshots.get(device_mac)
+        if snapshot is None:
+            return
+        self.changes.update_device(device_mac, snapshot)
+        for update_callback in list(self._device_listeners.get(device_mac, ())):
+            update_callback()
+    
+    async def _async_update_data(self):
+        """Met à jour les données pour tous les appareils."""
+        cycle_start = time.monotonic()
+        self.metrics.begin_cycle()
+        self.changes.clear_changes()
+        published = 0
+        cycle_error: str | None = None
         try:
-            # Initialiser la session si nécessaire
-            if not self.session:
-                import aiohttp
-                self.session = aiohttp.ClientSession()
-            
-            headers = {
-                "Accept": "application/json",
-                "Accept-Language": "fr",
-                "Authorization": self.token,
-                "Content-Type": "application/json",
-                "User-Agent": "okhttp/3.14.9"
-            }
-            
-            data = {
-                "userId": self.user_id,
-                "bleMac": device_mac
+            # S'assurer que l'authentification est faite (et le jeton non expiré)
+            if not await self.api_client.async_ensure_token():
+                raise UpdateFailed("Échec de l'authentification")
+
+            # Récupération des appareils (au démarrage, puis à faible fréquence)
+            if (
+                not self.devices
+                or self._devices_fetched_at is None
+                or time.monotonic() - self._devices_fetched_at >= self.discovery_interval
+            ):
+                await self._async_discover_devices()
+
+            # Récupération des données de tous les appareils en parallèle
+            results = await asyncio.gather(
+                *(self._async_fetch_device(device) for device in self.devices)
+            )
+            
+            # Les appareils sans données sont ignorés, les autres sont publiés
+            all_devices_data = {
+                device_mac: snapshot
+                for device_mac, snapshot in results
+                if snapshot is not None
             }
             
-            _LOGGER.info(f"🔍 Récupération du mode actuel pour {device_mac}...")
+            # Résumé des appareils en quarantaine, limité à un message par période
+            quarantined = sum(1 for health in self.health.values() if health.quarantined)
+            if quarantined:
+                self._log_throttle.warning(
+                    "quarantine_summary",
+                    "⚠️ %d appareil(s) sur %d hors ligne ou introuvable(s)",
+                    quarantined,
+                    len(self.devices),
+                )
+            
+            # Ajuster l'intervalle du prochain cycle selon l'activité observée
+            # (les appareils en quarantaine n'apportent pas de mesure)
+            interval = self.scheduler.update({
+                device_mac: snapshot
+                for device_mac, snapshot in all_devices_data.items()
+                if not snapshot.offline
+            })
+            self.update_interval = timedelta(seconds=interval)
+            
+            # Champs modifiés depuis la dernière publication : seules les
+            # entités concernées écriront leur état
+            self.changes.update(all_devices_data)
+            
+            # Sauvegarde différée : au plus une écriture par STORAGE_SAVE_DELAY
+            if self._store is not None and all_devices_data:
+                self._store.async_delay_save(self._cache_payload, STORAGE_SAVE_DELAY)
+            
+            published = len(all_devices_data)
+            return all_devices_data
             
-            async with self.session.post(
-                f"{self.base_url}/api/devices/setting/download",
-                json=data,
-                headers=headers
-            ) as response:
-                
-                _LOGGER.info(f"📥 Réponse mode actuel: HTTP {response.status}")
-                
-                if response.status == 200:
-                    response_data = await response.json()
-                    
-                    if response_data.get("code") == 0:
-                        device_settings = response_data.get("data", {})
-                        current_mode = device_settings.get("mode", 1)
-                        _LOGGER.info(f"✅ Mode actuel récupéré: {current_mode}")
-                        return current_mode
-                    else:
-                        _LOGGER.error(f"❌ Erreur API mode actuel: {response_data.get('message')}")
-                        return 1
-                else:
-                    response_text = await response.text()
-                    _LOGGER.error(f"❌ Erreur HTTP mode actuel: {response.status}")
-                    return 1
-                    
-        except Exception as e:
-            _LOGGER.error(f"❌ Erreur récupération mode actuel pour {device_mac}: {e}")
-            return 1
+        except UpdateFailed as err:
+            cycle_error = str(err)
+            raise
+        except Exception as err:
+            cycle_error = f"{type(err).__name__}: {err}"
+            _LOGGER.error("❌ Erreur lors de la mise à jour des données: %s", err)
+            raise UpdateFailed(f"Erreur API: {err}")
+        finally:
+            self.metrics.record_cycle(time.monotonic() - cycle_start, published, cycle_error)
+
+    async def _async_discover_devices(self) -> None:
+        """Met à jour la liste des appareils et retire ceux qui ont quitté le compte."""
+        _LOGGER.debug("📋 Récupération des appareils...")
+        devices = await self.api_client.get_devices()
+        if not devices:
+            if not self.devices:
+                raise UpdateFailed("Aucun appareil trouvé")
+            # Échec ponctuel : on conserve la liste connue et on réessaiera
+            self._log_throttle.warning(
+                "device_list", "⚠️ Liste des appareils indisponible - Liste précédente conservée"
+            )
+            return
+        
+        self._devices_fetched_at = time.monotonic()
+        known_macs = {device.get("bleMac") for device in self.devices}
+        current_macs = {device.get("bleMac") for device in devices}
+        self.devices = devices
+        
+        added = current_macs - known_macs
+        removed = known_macs - current_macs
+        if added:
+            _LOGGER.info("📱 Nouveaux appareils: %s", ", ".join(sorted(added)))
+        if removed:
+            self._async_remove_devices(removed)
+        _LOGGER.debug("📱 %d appareil(s) trouvé(s)", len(devices))
     
-    async def set_discharge_threshold(self, device_mac: str, threshold: int) -> bool:
-        """Change le seuil de décharge d'un appareil."""
-        if not self.token or not self.user_id or not device_mac:
-            _LOGGER.error("Token, User ID ou Device MAC manquant pour set_discharge_threshold")
-            return False
+    @callback
+    def _async_remove_devices(self, removed_macs: set[str]) -> None:
+        """Oublie les appareils retirés du compte et supprime leurs entités."""
+        device_registry = dr.async_get(self.hass)
         
-        try:
-            # Initialiser la session si nécessaire
-            if not self.session:
-                import aiohttp
-                self.session = aiohttp.ClientSession()
-            
-            headers = {
-                "Accept": "application/json",
-                "Accept-Language": "fr",
-                "Authorization": self.token,
-                "Content-Type": "application/json",
-                "User-Agent": "okhttp/3.14.9"
-            }
-            
-            # Récupérer les paramètres actuels
-            current_settings = await self.get_device_settings(device_mac)
-            if not current_settings:
-                _LOGGER.error(f"❌ Impossible de récupérer les paramètres actuels pour {device_mac}")
-                return False
-            
-            # Mettre à jour le seuil de décharge avec tous les paramètres requis
-            data = {
-                "bleMac": device_mac,
-                "bmsEnable": current_settings.get("bmsEnable", True),
-                "bmsPower": threshold,
-                "ctAPower": current_settings.get("ctAPower", 0),
-                "ctBPower": current_settings.get("ctBPower", 0),
-                "ctCPower": current_settings.get("ctCPower", 0),
-                "ctEnable": current_settings.get("ctEnable", 0),
-                "ctTotalPower": current_settings.get("ctTotalPower", 0),
-                "currencyCode": current_settings.get("currencyCode", "EUR"),
-                "deviceControl": current_settings.get("deviceControl", 0),
-                "gridCode": current_settings.get("gridCode", 0),
-                "gridControl": current_settings.get("gridControl", 0),
-                "gridEnable": current_settings.get("gridEnable", 0),
-                "gridTime": current_settings.get("gridTime", 0),
-                "mode": current_settings.get("mode", 1),
-                "otaStatus": current_settings.get("otaStatus", 1),
-                "peakShavingDetails": current_settings.get("peakShavingDetails", ["|00:00-23:59|4000|"]),
-                "periodDetail": current_settings.get("periodDetail", [
-                    ["|00:00-08:00|1500|", "|08:00-18:00|0|", "|18:00-22:00|3000|", "|22:00-23:59|1000|"],
-                    ["|00:00-08:00|1000|", "|08:00-18:00|0|", "|18:00-22:00|2000|", "|22:00-23:59|1500|"],
-                    ["|00:00-08:00|1500|", "|08:00-18:00|0|", "|18:00-22:00|2000|", "|22:00-23:59|1500|"],
-                    ["|00:00-08:00|1500|", "|08:00-18:00|0|", "|18:00-22:00|2000|", "|22:00-23:59|1500|"],
-                    ["|00:00-08:00|1500|", "|08:00-18:00|0|", "|18:00-22:00|2000|", "|22:00-23:59|3000|"],
-                    ["|00:00-08:00|1500|", "|08:00-18:00|0|", "|18:00-22:00|2000|", "|22:00-23:59|1500|"],
-                    ["|00:00-08:00|1500|", "|08:00-18:00|0|", "|18:00-22:00|2000|", "|22:00-23:59|1500|"]
-                ]),
-                "periods": current_settings.get("periods", 0),
-                "pfSwitch": current_settings.get("pfSwitch", 0),
-                "pfValue": current_settings.get("pfValue", 0),
-                "pricePerKwh": current_settings.get("pricePerKwh", 0.3),
-                "soc": current_settings.get("soc", 10),
-                "timezone": current_settings.get("timezone", 2.0),
-                "userId": self.user_id
-            }
-            
-            _LOGGER.info(f"🔧 Modification du seuil de décharge à {threshold}% pour {device_mac}...")
-            
-            async with self.session.post(
-                f"{self.base_url}/api/devices/setting/upload",
-                json=data,
-                headers=headers
-            ) as response:
-                
-                _LOGGER.info(f"📥 Réponse seuil de décharge: HTTP {response.status}")
-                
-                if response.status == 200:
-                    response_data = await response.json()
-                    
-                    if response_data.get("code") == 0:
-                        _LOGGER.info(f"✅ Seuil de décharge mis à jour à {threshold}% pour {device_mac}")
-                        return True
-                    else:
-                        _LOGGER.error(f"❌ Erreur API seuil de décharge: {response_data.get('message')}")
-                        return False
-                else:
-                    response_text = await response.text()
-                    _LOGGER.error(f"❌ Erreur HTTP seuil de décharge: {response.status}")
-                    return False
-                    
-        except Exception as e:
-            _LOGGER.error(f"❌ Erreur modification seuil de décharge pour {device_mac}: {e}")
-            return False
+        for device_mac in removed_macs:
+            _LOGGER.info("🗑️ Appareil %s retiré du compte", device_mac)
+            self._settings_cache.pop(device_mac, None)
+            self._settings_fetched_at.pop(device_mac, None)
+            self._settings_locks.pop(device_mac, None)
+            self._optimistic.pop(device_mac, None)
+            queue = self._command_queues.pop(device_mac, None)
+            if queue is not None:
+                queue.cancel()
+            self.health.pop(device_mac, None)
+            self._device_infos.pop(device_mac, None)
+            self._snapshots.pop(device_mac, None)
+            self.history.pop(device_mac, None)
+            self.analytics.pop(device_mac, None)
+            if self.data:
+                self.data.pop(device_mac, None)
+            
+            # La suppression de l'appareil entraîne celle de ses entités
+            device = device_registry.async_get_device(identifiers={(DOMAIN, device_mac)})
+            if device is not None and self.entry_id is not None:
+                device_registry.async_update_device(
+                    device.id, remove_config_entry_id=self.entry_id
+                )
     
-    async def get_device_settings(self, device_mac: str) -> dict:
-        """Récupère les paramètres actuels d'un appareil."""
-        if not self.token or not self.user_id or not device_mac:
-            _LOGGER.error("Token, User ID ou Device MAC manquant pour get_device_settings")
-            return {}
+    def device_info(self, device_mac: str) -> dr.DeviceInfo:
+        """Informations d'appareil d'une batterie, partagées par toutes ses entités."""
+        info = self._device_infos.get(device_mac)
+        if info is None:
+            device_name = ((self.data or {}).get(device_mac) or {}).get("device_name") or next(
+                (device.get("name") for device in self.devices if device.get("bleMac") == device_mac),
+                None,
+            )
+            info = self._device_infos[device_mac] = dr.DeviceInfo(
+                identifiers={(DOMAIN, device_mac)},
+                name=device_name or f"Big Blue {device_mac}",
+                manufacturer="Big Blue",
+                model="Battery System",
+                sw_version="1.0.0",
+            )
+        return info
+    
+    @callback
+    def async_add_device_listener(
+        self, add_devices: Callable[[list[str]], None]
+    ) -> CALLBACK_TYPE:
+        """Appelle `add_devices` avec les MAC des appareils pas encore vus par une plateforme.
+
+        L'appel initial couvre les appareils déjà présents ; les suivants ont
+        lieu après chaque rafraîchissement qui fait apparaître un nouvel appareil.
+        """
+        known_macs: set[str] = set()
         
-        try:
-            # Initialiser la session si nécessaire
-            if not self.session:
-                import aiohttp
-                self.session = aiohttp.ClientSession()
-            
-            headers = {
-                "Accept": "application/json",
-                "Accept-Language": "fr",
-                "Authorization": self.token,
-                "Content-Type": "application/json",
-                "User-Agent": "okhttp/3.14.9"
-            }
-            
-            data = {
-                "userId": self.user_id,
-                "bleMac": device_mac
-            }
-            
-            async with self.session.post(
-                f"{self.base_url}/api/devices/setting/download",
-                json=data,
-                headers=headers
-            ) as response:
-                
-                if response.status == 200:
-                    response_data = await response.json()
-                    
-                    if response_data.get("code") == 0:
-                        device_settings = response_data.get("data", {})
-                        return device_settings
-                    else:
-                        _LOGGER.error(f"❌ Erreur API paramètres: {response_data.get('message')}")
-                        return {}
-                else:
-                    _LOGGER.error(f"❌ Erreur HTTP paramètres: {response.status}")
-                    return {}
-                    
-        except Exception as e:
-            _LOGGER.error(f"❌ Erreur récupération paramètres pour {device_mac}: {e}")
-            return {}
+        @callback
+        def _async_check_devices() -> None:
+            # Un appareil retiré du compte puis rajouté doit être recréé
+            known_macs.intersection_update(device.get("bleMac") for device in self.devices)
+            new_macs = [mac for mac in self.data or {} if mac not in known_macs]
+            if new_macs:
+                known_macs.update(new_macs)
+                add_devices(new_macs)
+        
+        _async_check_devices()
+        return self.async_add_listener(_async_check_devices)
     
-    async def get_discharge_threshold(self, device_mac: str) -> int:
-        """Récupère le seuil de décharge actuel d'un appareil."""
-        if not self.token or not self.user_id or not device_mac:
-            _LOGGER.error("Token, User ID ou Device MAC manquant pour get_discharge_threshold")
-            return 10  # Valeur par défaut
+    async def _async_fetch_device(self, device: dict) -> tuple[str, DeviceSnapshot | None]:
+        """Récupère un appareil en respectant la limite de concurrence et le délai maximal."""
+        device_mac = device.get("bleMac")
+        device_name = device.get("name", f"Big Blue {device_mac}")
+        
+        # Appareil en quarantaine : pas de requête avant le prochain sondage
+        health = self.health.setdefault(device_mac, DeviceHealth())
+        if not health.should_poll(time.monotonic()):
+            return device_mac, self._offline_data(device_mac, device_name)
         
+        async with self._semaphore:
+            try:
+                snapshot = await asyncio.wait_for(
+                    self._async_fetch_device_data(device_mac, device_name),
+                    timeout=self.device_timeout,
+                )
+            except asyncio.TimeoutError:
+                self._log_throttle.warning(
+                    ("timeout", device_mac),
+                    "⏱️ Délai dépassé (%ss) pour %s - Device ignoré pour ce cycle",
+                    self.device_timeout,
+                    device_name,
+                )
+                return device_mac, None
+            except Exception as err:  # pylint: disable=broad-except
+                # Un appareil en erreur ne doit pas bloquer les autres
+                self._log_throttle.error(
+                    ("fetch", device_mac), "❌ Erreur lors de la récupération de %s: %s", device_name, err
+                )
+                return device_mac, None
+        
+        return device_mac, snapshot
+
+    async def _async_fetch_device_data(self, device_mac: str, device_name: str) -> DeviceSnapshot | None:
+        """Récupère les données d'un appareil et met à jour son instantané."""
+        _LOGGER.debug("📊 Récupération des données pour %s...", device_name)
+        
+        # Télémétrie et paramètres récupérés en parallèle : les paramètres ne
+        # sont téléchargés que s'ils sont périmés (voir settings_interval)
         try:
-            # Initialiser la session si nécessaire
-            if not self.session:
-                import aiohttp
-                self.session = aiohttp.ClientSession()
-            
-            headers = {
-                "Accept": "application/json",
-                "Accept-Language": "fr",
-                "Authorization": self.token,
-                "Content-Type": "application/json",
-                "User-Agent": "okhttp/3.14.9"
-            }
-            
-            data = {
-                "userId": self.user_id,
-                "bleMac": device_mac
-            }
-            
-            _LOGGER.info(f"🔍 Récupération du seuil de décharge pour {device_mac}...")
-            
-            async with self.session.post(
-                f"{self.base_url}/api/devices/setting/download",
-                json=data,
-                headers=headers
-            ) as response:
-                
-                _LOGGER.info(f"📥 Réponse seuil de décharge: HTTP {response.status}")
-                
-                if response.status == 200:
-                    response_data = await response.json()
-                    
-                    if response_data.get("code") == 0:
-                        device_settings = response_data.get("data", {})
-                        threshold = device_settings.get("bmsPower", 10)
-                        _LOGGER.info(f"✅ Seuil de décharge récupéré: {threshold}%")
-                        return threshold
-                    else:
-                        _LOGGER.error(f"❌ Erreur API seuil de décharge: {response_data.get('message')}")
-                        return 10
-                else:
-                    response_text = await response.text()
-                    _LOGGER.error(f"❌ Erreur HTTP seuil de décharge: {response.status}")
-                    return 10
-                    
-        except Exception as e:
-            _LOGGER.error(f"❌ Erreur récupération seuil de décharge pour {device_mac}: {e}")
-            return 10
+            data, settings = await asyncio.gather(
+                self.api_client.async_get_last_data(device_mac),
+                self._async_get_settings(device_mac),
+            )
+        except BigBlueDeviceOfflineError as err:
+            return self._quarantine(device_mac, device_name, STATE_OFFLINE, err)
+        except BigBlueRecordNotFoundError as err:
+            return self._quarantine(device_mac, device_name, STATE_MISSING, err)
+        except BigBlueApiError as err:
+            self._log_throttle.error(("api", device_mac), "❌ Erreur API pour %s: %s", device_name, err)
+            return None
+        
+        if not data:
+            self._log_throttle.warning(
+                ("no_data", device_mac),
+                "⚠️ Aucune donnée pour %s - Device ignoré (pas de données par défaut)",
+                device_name,
+            )
+            # Ne pas créer de données par défaut pour éviter les devices "default"
+            return None
+        
+        if self.health.setdefault(device_mac, DeviceHealth()).record_success():
+            self._log_throttle.log(
+                logging.INFO,
+                ("recovered", device_mac),
+                "✅ %s de nouveau en ligne - Fin de la quarantaine",
+                device_name,
+            )
+        
+        # Mise à jour sur place de l'instantané (table des champs, une passe)
+        snapshot = self._snapshot(device_mac, device_name)
+        snapshot.update(data, settings, device_name)
+        # Valeurs envoyées mais pas encore relues : elles restent affichées
+        overrides = self._optimistic.get(device_mac)
+        if overrides:
+            snapshot.apply_values(overrides)
+        # Horloge monotone : l'historique reste ordonné malgré un saut de l'heure système
+        now = time.monotonic()
+        self._history_for(device_mac).append(now, snapshot)
+        snapshot.apply_values(self._analytics_for(snapshot).update(now, snapshot))
+        
+        _LOGGER.debug(
+            "✅ Données mises à jour pour %s: SOC=%s%%, Puissance PV=%sW (version %d)",
+            device_name,
+            snapshot.soc,
+            snapshot.pv_total_power,
+            snapshot.version,
+        )
+        
+        return snapshot
+    
+    def _quarantine(self, device_mac: str, device_name: str, state: str, err: Exception) -> DeviceSnapshot:
+        """Place un appareil en quarantaine et retourne ses données marquées hors ligne."""
+        health = self.health.setdefault(device_mac, DeviceHealth())
+        first_failure = not health.quarantined
+        backoff = health.record_failure(state, time.monotonic(), str(err))
+        
+        # Un appareil qui alterne en ligne / hors ligne n'est signalé qu'une
+        # fois par période ; le résumé du cycle donne le total
+        if not first_failure or not self._log_throttle.warning(
+            ("quarantine", device_mac),
+            "⚠️ %s %s - Quarantaine, prochain essai dans %.0fs",
+            device_name,
+            "hors ligne" if state == STATE_OFFLINE else "introuvable",
+            backoff,
+        ):
+            _LOGGER.debug("%s toujours indisponible - Prochain essai dans %.0fs", device_name, backoff)
+        
+        return self._offline_data(device_mac, device_name)
+    
+    def _history_for(self, device_mac: str) -> TelemetryRingBuffer:
+        """Historique en mémoire d'un appareil, alloué à sa première mesure.
+
+        La capacité couvre HISTORY_WINDOW secondes à l'intervalle minimal du
+        planificateur, quel que soit le transport.
+        """
+        history = self.history.get(device_mac)
+        if history is None:
+            history = self.history[device_mac] = TelemetryRingBuffer(
+                math.ceil(HISTORY_WINDOW / self.scheduler.min_interval)
+            )
+        return history
+    
+    def _analytics_for(self, snapshot: DeviceSnapshot) -> EnergyAnalytics:
+        """Indicateurs dérivés d'un appareil (énergies reprises depuis l'instantané)."""
+        analytics = self.analytics.get(snapshot.device_mac)
+        if analytics is None:
+            analytics = self.analytics[snapshot.device_mac] = EnergyAnalytics(
+                snapshot.charged_energy, snapshot.discharged_energy
+            )
+        return analytics
+    
+    def _snapshot(self, device_mac: str, device_name: str) -> DeviceSnapshot:
+        """Instantané d'un appareil, créé à la première réponse."""
+        snapshot = self._snapshots.get(device_mac)
+        if snapshot is None:
+            snapshot = self._snapshots[device_mac] = DeviceSnapshot(device_mac, device_name)
+        return snapshot
+    
+    def _offline_data(self, device_mac: str, device_name: str) -> DeviceSnapshot:
+        """Dernières données connues d'un appareil, marquées hors ligne.
+
+        L'appareil reste dans coordinator.data afin que ses entités passent
+        indisponibles au lieu de disparaître.
+        """
+        snapshot = self._snapshot(device_mac, device_name)
+        snapshot.mark_offline()
+        return snapshot
@@ -0,0 +1,68 @@
+"""Diagnostics de l'intégration Big Blue."""
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+# Données sensibles de l'entrée et des réponses Powafree
+TO_REDACT = {"email", "password", "token", "userId", "user_id"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Retourne les diagnostics d'une entrée (appareils, santé, trace des cycles)."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    now = time.monotonic()
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": (
+                coordinator.update_interval.total_seconds()
+                if coordinator.update_interval
+                else None
+            ),
+            "activity": coordinator.scheduler.activity,
+            "max_concurrency": coordinator.max_concurrency,
+            "device_timeout": coordinator.device_timeout,
+            "settings_interval": coordinator.settings_interval,
+            "discovery_interval": coordinator.discovery_interval,
+        },
+        "devices": [
+            async_redact_data(device, TO_REDACT) for device in coordinator.devices
+        ],
+        "health": {
+            device_mac: {
+                "state": health.state,
+                "failures": health.failures,
+                "next_probe_in": (
+                    round(max(health.next_probe - now, 0.0), 1)
+                    if health.quarantined
+                    else None
+                ),
+                "last_error": health.last_error,
+            }
+            for device_mac, health in coordinator.health.items()
+        },
+        "data": {
+            device_mac: {
+                key: value
+                for key, value in device_data.items()
+                if key != "settings"
+            }
+            for device_mac, device_data in (coordinator.data or {}).items()
+        },
+        "metrics": coordinator.metrics.as_dict(),
+        "cycles": coordinator.metrics.trace.as_list(),
+    }
@@ -0,0 +1,52 @@
+"""Entité de base des batteries Big Blue."""
+from __future__ import annotations
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .snapshot import DeviceSnapshot
+
+
+class BigBlueDeviceEntity(CoordinatorEntity):
+    """Entité rattachée à une batterie, mise à jour seulement si ses champs changent."""
+
+    # Champs de coordinator.data lus par l'entité
+    _watched_keys: tuple[str, ...] = ()
+
+    def __init__(self, coordinator, device_mac: str) -> None:
+        """Initialise l'entité."""
+        super().__init__(coordinator)
+        self._device_mac = device_mac
+        self._attr_device_info = coordinator.device_info(device_mac)
+        self._last_available: bool | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Abonne aussi l'entité aux rafraîchissements ciblés de son appareil."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_device_update_listener(
+                self._device_mac, self._handle_coordinator_update
+            )
+        )
+
+    @property
+    def snapshot(self) -> DeviceSnapshot | None:
+        """Instantané de l'appareil, None s'il est absent des données."""
+        return (self.coordinator.data or {}).get(self._device_mac)
+
+    @property
+    def available(self) -> bool:
+        """Indisponible si l'appareil est hors ligne (quarantaine) ou absent des données."""
+        snapshot = self.snapshot
+        return super().available and snapshot is not None and not snapshot.offline
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """N'écrit l'état que si la disponibilité ou l'un des champs suivis a changé."""
+        available = self.available
+        if available == self._last_available and not self.coordinator.changes.has_changed(
+            self._device_mac, self._watched_keys
+        ):
+            return
+        self._last_available = available
+        super()._handle_coordinator_update()
@@ -0,0 +1,187 @@
+"""Table des champs Powafree : conversion des unités et description des capteurs.
+
+Chaque champ relie une clé de l'API à sa clé interne (coordinator.data) et
+porte l'échelle de conversion ainsi que les métadonnées de l'entité. Le
+décodage et la création des capteurs s'appuient tous deux sur cette table.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from .const import DEADBANDS
+
+
+@dataclass(frozen=True)
+class BigBlueField:
+    """Champ de la télémétrie ou des paramètres d'un appareil."""
+
+    key: str  # Clé interne (coordinator.data)
+    api_key: str  # Clé dans la réponse Powafree
+    scale: float = 1  # Diviseur appliqué à la valeur brute
+    default: Any = 0  # Valeur si la clé est absente de la réponse
+    transform: Callable[[Any], Any] | None = None  # Conversion non numérique
+    # Capteur associé (None : pas d'entité capteur)
+    name: str | None = None
+    unit: str | None = None
+    device_class: str | None = None
+    icon: str | None = None
+    # Variation minimale publiée (None : selon DEADBANDS et le type de mesure)
+    deadband: float | None = None
+
+
+# Télémétrie (/api/devices/last_data)
+TELEMETRY_FIELDS: tuple[BigBlueField, ...] = (
+    # Batterie
+    BigBlueField("soc", "totalSoc", 10, name="État de charge", unit="%", device_class="battery", icon="mdi:battery"),
+    BigBlueField("soh", "totalSoh", 10, name="État de santé", unit="%", device_class="battery", icon="mdi:heart-pulse"),
+    BigBlueField("voltage", "totalVoltage", 10, name="Tension", unit="V", device_class="voltage", icon="mdi:lightning-bolt"),
+    BigBlueField("current", "totalCurrent", name="Courant", unit="A", device_class="current", icon="mdi:current-ac"),
+    BigBlueField("power", "totalPower", 10, name="Puissance", unit="W", device_class="power", icon="mdi:power"),
+    BigBlueField("remaining_capacity", "totalRemainingCapacity", 1000, name="Capacité Restante", unit="kWh", device_class="energy", icon="mdi:battery-50"),
+    BigBlueField("rated_capacity", "TotalRatedCapacity", 1000, name="Capacité Nominale", unit="kWh", device_class="energy", icon="mdi:battery"),
+    # Panneaux solaires
+    BigBlueField("pv1_voltage", "pv1V", 10, name="Tension PV1", unit="V", device_class="voltage", icon="mdi:solar-power"),
+    BigBlueField("pv1_current", "pv1A", name="Courant PV1", unit="A", device_class="current", icon="mdi:solar-power"),
+    BigBlueField("pv1_power", "pv1W", 10, name="Puissance PV1", unit="W", device_class="power", icon="mdi:solar-power"),
+    BigBlueField("pv2_voltage", "pv2V", 10, name="Tension PV2", unit="V", device_class="voltage", icon="mdi:solar-power"),
+    BigBlueField("pv2_current", "pv2A", name="Courant PV2", unit="A", device_class="current", icon="mdi:solar-power"),
+    BigBlueField("pv2_power", "pv2W", 10, name="Puissance PV2", unit="W", device_class="power", icon="mdi:solar-power"),
+    BigBlueField("pv_total_power", "pvTotalPower", 10, name="Puissance PV Totale", unit="W", device_class="power", icon="mdi:solar-power-variant"),
+    # Production d'énergie
+    BigBlueField("daily_generation", "dailyGeneration", 1000, name="Énergie Solaire", unit="kWh", device_class="energy", icon="mdi:solar-power"),
+    BigBlueField("total_generation", "totalGeneration", 1000, name="Énergie Solaire Totale", unit="kWh", device_class="energy", icon="mdi:solar-power"),
+    BigBlueField("daily_output_energy", "dailyOutputEnergy", 1000, name="Énergie Sortie", unit="kWh", device_class="energy", icon="mdi:lightning-bolt"),
+    BigBlueField("total_output_energy", "totalOutputEnergy", 1000, name="Énergie Sortie Totale", unit="kWh", device_class="energy", icon="mdi:lightning-bolt"),
+    # Température
+    BigBlueField("max_temperature", "maxTemperature", 10, name="Température Max", unit="°C", device_class="temperature", icon="mdi:thermometer-high"),
+    BigBlueField("min_temperature", "minTemperature", 10, name="Température Min", unit="°C", device_class="temperature", icon="mdi:thermometer-low"),
+    # CO2 et temps de fonctionnement
+    BigBlueField("daily_co2_savings", "dailyCo2Savings", name="Économies CO2", unit="g", device_class="weight", icon="mdi:leaf"),
+    BigBlueField("daily_runtime", "dailyRuntime", 3600, name="Temps Fonctionnement", unit="h", device_class="duration", icon="mdi:clock-outline"),
+    BigBlueField("total_runtime", "totalRuntime", name="Temps Total", unit="h", device_class="duration", icon="mdi:clock"),
+    # Sans capteur
+    BigBlueField("battery_count", "batteryCount"),
+    BigBlueField("status", "status"),
+)
+
+# Paramètres (/api/devices/setting/download)
+SETTINGS_FIELDS: tuple[BigBlueField, ...] = (
+    BigBlueField("current_mode", "mode", default=1, name="Mode Actuel", icon="mdi:cog"),
+    BigBlueField("discharge_threshold", "bmsPower", default=10),
+    BigBlueField("bms_enable", "bmsEnable", default=False, transform=bool),
+    BigBlueField("grid_enable", "gridEnable", default=0, transform=bool),
+)
+
+# Champs exposés comme capteurs, dans l'ordre de création des entités
+SENSOR_FIELDS: tuple[BigBlueField, ...] = tuple(
+    field for field in (*TELEMETRY_FIELDS, *SETTINGS_FIELDS) if field.name is not None
+)
+
+
+def _deadband(field: BigBlueField) -> float:
+    """Zone morte d'un champ : la sienne, sinon celle de son type de mesure."""
+    if field.deadband is not None:
+        return field.deadband
+    return DEADBANDS.get(field.device_class, 0)
+
+
+# Zone morte de chaque champ numérique qui en a une
+FIELD_DEADBANDS: dict[str, float] = {
+    field.key: _deadband(field) for field in TELEMETRY_FIELDS if _deadband(field)
+}
+
+
+_DecodePlan = tuple[tuple[str, str, Any, Callable[[Any], Any] | None], ...]
+
+
+def _compile(fields: tuple[BigBlueField, ...]) -> _DecodePlan:
+    """Précalcule (clé interne, clé API, défaut, conversion) pour chaque champ."""
+    plan = []
+    for field in fields:
+        convert = field.transform
+        if convert is None and field.scale != 1:
+            convert = _scaler(field.scale)
+        plan.append((field.key, field.api_key, field.default, convert))
+    return tuple(plan)
+
+
+def _scaler(scale: float) -> Callable[[Any], Any]:
+    """Conversion d'une valeur brute par division (valeurs non numériques inchangées)."""
+
+    def convert(value: Any) -> Any:
+        try:
+            return value / scale
+        except TypeError:
+            return value
+
+    return convert
+
+
+_TELEMETRY_PLAN = _compile(TELEMETRY_FIELDS)
+_SETTINGS_PLAN = _compile(SETTINGS_FIELDS)
+
+
+def _decode(plan: _DecodePlan, payload: Mapping[str, Any], into: dict[str, Any]) -> dict[str, Any]:
+    """Applique un plan de décodage en une seule passe."""
+    get = payload.get
+    for key, api_key, default, convert in plan:
+        value = get(api_key, default)
+        into[key] = value if convert is None else convert(value)
+    return into
+
+
+def decode_telemetry(payload: Mapping[str, Any], into: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Convertit la télémétrie brute de l'API en valeurs internes (%, V, W, kWh, °C, h)."""
+    return _decode(_TELEMETRY_PLAN, payload, {} if into is None else into)
+
+
+def decode_settings(settings: Mapping[str, Any], into: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Extrait des paramètres les valeurs exposées par les entités."""
+    return _decode(_SETTINGS_PLAN, settings, {} if into is None else into)
+
+
+def _apply(plan: _DecodePlan, payload: Mapping[str, Any], target: Any) -> bool:
+    """Applique un plan de décodage aux attributs de `target` ; True si l'un a changé."""
+    get = payload.get
+    changed = False
+    for key, api_key, default, convert in plan:
+        value = get(api_key, default)
+        if convert is not None:
+            value = convert(value)
+        if getattr(target, key) != value:
+            setattr(target, key, value)
+            changed = True
+    return changed
+
+
+def apply_telemetry(target: Any, payload: Mapping[str, Any]) -> bool:
+    """Met à jour sur place la télémétrie d'un instantané (voir snapshot.DeviceSnapshot)."""
+    return _apply(_TELEMETRY_PLAN, payload, target)
+
+
+def apply_settings(target: Any, settings: Mapping[str, Any]) -> bool:
+    """Met à jour sur place les valeurs issues des paramètres d'un instantané."""
+    return _apply(_SETTINGS_PLAN, settings, target)
+
+
+# Champs de paramètres modifiables, par clé interne
+_SETTINGS_BY_KEY: dict[str, BigBlueField] = {field.key: field for field in SETTINGS_FIELDS}
+
+
+def encode_settings(values: Mapping[str, Any]) -> dict[str, Any]:
+    """Convertit des valeurs internes (`{"current_mode": 2}`) en patch de paramètres API.
+
+    Lève KeyError pour un champ qui n'est pas un paramètre.
+    """
+    patch = {}
+    for key, value in values.items():
+        field = _SETTINGS_BY_KEY[key]
+        if field.transform is bool:
+            # L'API attend le type de sa valeur par défaut (bmsEnable booléen, gridEnable 0/1)
+            value = type(field.default)(value)
+        elif field.scale != 1:
+            value = value * field.scale
+        patch[field.api_key] = value
+    return patch
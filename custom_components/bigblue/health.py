@@ -0,0 +1,52 @@
+"""Suivi de l'état de santé des appareils Big Blue."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .const import OFFLINE_BACKOFF_BASE, OFFLINE_BACKOFF_MAX
+
+STATE_ONLINE = "online"
+STATE_OFFLINE = "offline"  # Code 1002
+STATE_MISSING = "missing"  # Code 1013 (Record not found)
+
+
+@dataclass
+class DeviceHealth:
+    """État d'un appareil et planification des sondages pendant sa mise en quarantaine.
+
+    Un appareil hors ligne ou introuvable n'est plus interrogé à chaque cycle :
+    il est sondé après un délai qui double à chaque échec consécutif, borné par
+    OFFLINE_BACKOFF_MAX.
+    """
+
+    state: str = STATE_ONLINE
+    failures: int = 0
+    next_probe: float = 0.0
+    last_error: str | None = None
+
+    @property
+    def quarantined(self) -> bool:
+        """Indique si l'appareil est en quarantaine."""
+        return self.state != STATE_ONLINE
+
+    def should_poll(self, now: float) -> bool:
+        """Indique si l'appareil doit être interrogé à ce cycle."""
+        return not self.quarantined or now >= self.next_probe
+
+    def record_success(self) -> bool:
+        """Enregistre une réponse valide ; retourne True si l'appareil sort de quarantaine."""
+        recovered = self.quarantined
+        self.state = STATE_ONLINE
+        self.failures = 0
+        self.next_probe = 0.0
+        self.last_error = None
+        return recovered
+
+    def record_failure(self, state: str, now: float, error: str | None = None) -> float:
+        """Met l'appareil en quarantaine et retourne le délai avant le prochain sondage."""
+        self.state = state
+        self.failures += 1
+        self.last_error = error
+        backoff = min(OFFLINE_BACKOFF_BASE * 2 ** (self.failures - 1), OFFLINE_BACKOFF_MAX)
+        self.next_probe = now + backoff
+        return backoff
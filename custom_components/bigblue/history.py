@@ -0,0 +1,115 @@
+"""Historique haute résolution de la télémétrie (tampon circulaire en mémoire)."""
+from __future__ import annotations
+
+import math
+from array import array
+from bisect import bisect_left
+from typing import Any
+
+from .snapshot import DeviceSnapshot
+
+# Séries conservées à chaque cycle, dans l'unité de coordinator.data
+HISTORY_FIELDS = (
+    "power",
+    "pv1_power",
+    "pv2_power",
+    "pv_total_power",
+    "soc",
+    "current",
+    "max_temperature",
+    "min_temperature",
+)
+
+
+class TelemetryRingBuffer:
+    """Dernières mesures d'un appareil, à la résolution du cycle de mise à jour.
+
+    Les séries sont stockées dans des `array('d')` de taille fixe : la mémoire
+    est constante et l'ajout d'une mesure est en O(1). Les valeurs absentes ou
+    non numériques sont enregistrées comme NaN et ignorées par les statistiques.
+    Les horodatages doivent être croissants (time.monotonic) : les fenêtres
+    sont trouvées par recherche dichotomique.
+    """
+
+    __slots__ = ("capacity", "fields", "_timestamps", "_columns", "_next", "_size")
+
+    def __init__(self, capacity: int, fields: tuple[str, ...] = HISTORY_FIELDS) -> None:
+        """Alloue le tampon."""
+        self.capacity = max(1, capacity)
+        self.fields = fields
+        self._timestamps = array("d", bytes(8 * self.capacity))
+        self._columns = {name: array("d", bytes(8 * self.capacity)) for name in fields}
+        self._next = 0  # Position de la prochaine écriture
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Nombre de mesures conservées."""
+        return self._size
+
+    def append(self, timestamp: float, snapshot: DeviceSnapshot) -> None:
+        """Ajoute la mesure courante d'un instantané (écrase la plus ancienne si plein)."""
+        index = self._next
+        self._timestamps[index] = timestamp
+        for name, column in self._columns.items():
+            value = getattr(snapshot, name)
+            column[index] = value if isinstance(value, (int, float)) else math.nan
+        self._next = (index + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def _physical(self, position: int) -> int:
+        """Index dans les tableaux de la mesure n° `position` (0 : la plus ancienne)."""
+        return (self._next - self._size + position) % self.capacity
+
+    def _window(self, since: float | None, last: int | None) -> range:
+        """Positions chronologiques des mesures postérieures à `since` et/ou des `last` dernières."""
+        start = 0
+        if since is not None:
+            # Horodatages croissants : recherche dichotomique sur les positions
+            start = bisect_left(
+                range(self._size), since, key=lambda position: self._timestamps[self._physical(position)]
+            )
+        if last is not None:
+            start = max(start, self._size - max(0, last))
+        return range(start, self._size)
+
+    def samples(self, since: float | None = None, last: int | None = None, fields: tuple[str, ...] | None = None) -> list[dict[str, Any]]:
+        """Mesures de la fenêtre, de la plus ancienne à la plus récente."""
+        names = fields or self.fields
+        columns = [(name, self._columns[name]) for name in names]
+        result = []
+        for position in self._window(since, last):
+            index = self._physical(position)
+            sample: dict[str, Any] = {"timestamp": self._timestamps[index]}
+            for name, column in columns:
+                value = column[index]
+                sample[name] = None if math.isnan(value) else value
+            result.append(sample)
+        return result
+
+    def stats(self, name: str, since: float | None = None, last: int | None = None) -> dict[str, Any]:
+        """Minimum, maximum, moyenne et dernière valeur d'une série sur la fenêtre."""
+        column = self._columns[name]
+        count = 0
+        total = 0.0
+        minimum = math.inf
+        maximum = -math.inf
+        latest = None
+        for position in self._window(since, last):
+            value = column[self._physical(position)]
+            if math.isnan(value):
+                continue
+            count += 1
+            total += value
+            minimum = min(minimum, value)
+            maximum = max(maximum, value)
+            latest = value
+        if not count:
+            return {"count": 0, "min": None, "max": None, "mean": None, "last": None}
+        return {
+            "count": count,
+            "min": minimum,
+            "max": maximum,
+            "mean": round(total / count, 3),
+            "last": latest,
+        }
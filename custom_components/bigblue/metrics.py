@@ -0,0 +1,234 @@
+"""Métriques de l'intégration Big Blue (requêtes API et cycles de mise à jour)."""
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import Protocol
+
+from .api import RequestRecord
+
+# Bornes supérieures des intervalles de l'histogramme (secondes)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Nombre de cycles conservés dans la trace (diagnostics)
+TRACE_CYCLES = 20
+# Nombre maximal de requêtes tracées par cycle
+TRACE_MAX_REQUESTS = 500
+
+
+class MetricsSink(Protocol):
+    """Destination de métriques (ex. export Prometheus / StatsD)."""
+
+    def record_request(self, record: RequestRecord) -> None:
+        """Reçoit chaque tentative de requête API."""
+
+    def record_cycle(self, duration: float, devices: int) -> None:
+        """Reçoit la durée de chaque cycle de mise à jour."""
+
+
+class LatencyHistogram:
+    """Histogramme de latences à intervalles fixes (mémoire constante)."""
+
+    __slots__ = ("counts", "count", "total", "maximum")
+
+    def __init__(self) -> None:
+        """Initialise un histogramme vide."""
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Ajoute une mesure."""
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    @property
+    def mean(self) -> float | None:
+        """Latence moyenne."""
+        return self.total / self.count if self.count else None
+
+    def percentile(self, pct: float) -> float | None:
+        """Estimation du percentile (borne supérieure de l'intervalle atteint)."""
+        if not self.count:
+            return None
+        target = pct / 100 * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                if index < len(LATENCY_BUCKETS):
+                    return min(LATENCY_BUCKETS[index], self.maximum)
+                return self.maximum
+        return self.maximum
+
+    def as_dict(self) -> dict[str, int]:
+        """Nombre de mesures par intervalle (clé = borne supérieure)."""
+        labels = [f"le_{bound:g}" for bound in LATENCY_BUCKETS] + ["le_inf"]
+        return dict(zip(labels, self.counts))
+
+
+class EndpointStats:
+    """Compteurs d'un endpoint Powafree."""
+
+    __slots__ = ("requests", "errors", "retries", "latency")
+
+    def __init__(self) -> None:
+        """Initialise des compteurs vides."""
+        self.requests = 0
+        self.errors: Counter[str] = Counter()
+        self.retries = 0
+        self.latency = LatencyHistogram()
+
+    def as_dict(self) -> dict:
+        """Représentation exportable."""
+        return {
+            "requests": self.requests,
+            "errors": dict(self.errors),
+            "retries": self.retries,
+            "latency_mean": self.latency.mean,
+            "latency_p50": self.latency.percentile(50),
+            "latency_p95": self.latency.percentile(95),
+            "latency_p99": self.latency.percentile(99),
+            "latency_max": self.latency.maximum,
+            "histogram": self.latency.as_dict(),
+        }
+
+
+class CycleTrace:
+    """Trace des derniers cycles de mise à jour (tampon circulaire).
+
+    Chaque cycle conserve ses requêtes avec leur instant de départ relatif,
+    leur durée et leur code de résultat. Les requêtes émises hors cycle
+    (commandes des entités) sont rattachées au cycle suivant.
+    """
+
+    def __init__(self, maxlen: int = TRACE_CYCLES) -> None:
+        """Initialise un tampon vide."""
+        self.cycles: deque[dict] = deque(maxlen=maxlen)
+        self._started_at = time.monotonic()
+        self._requests: list[tuple] = []
+        self._dropped = 0
+
+    def begin(self) -> None:
+        """Démarre un nouveau cycle."""
+        self._started_at = time.monotonic()
+
+    def record_request(self, record: RequestRecord) -> None:
+        """Ajoute une requête au cycle en cours."""
+        if len(self._requests) >= TRACE_MAX_REQUESTS:
+            self._dropped += 1
+            return
+        # La requête vient de se terminer : son départ est `duration` plus tôt
+        offset = time.monotonic() - self._started_at - record.duration
+        self._requests.append((offset, record))
+
+    def end(self, duration: float, devices: int, error: str | None = None) -> None:
+        """Clôture le cycle en cours et l'ajoute au tampon."""
+        self.cycles.append({
+            "finished": datetime.now(timezone.utc).isoformat(),
+            "duration": round(duration, 4),
+            "devices": devices,
+            "error": error,
+            "requests_dropped": self._dropped,
+            "requests": [
+                {
+                    "start": round(offset, 4),
+                    "duration": round(record.duration, 4),
+                    "endpoint": record.endpoint,
+                    "device": record.device,
+                    "code": record.code,
+                    "attempt": record.attempt,
+                    "error": record.error,
+                }
+                for offset, record in self._requests
+            ],
+        })
+        self._requests = []
+        self._dropped = 0
+
+    def as_list(self) -> list[dict]:
+        """Cycles tracés, du plus ancien au plus récent."""
+        return list(self.cycles)
+
+
+class BigBlueMetrics:
+    """Agrège les métriques des requêtes et des cycles, et les relaie aux puits abonnés."""
+
+    def __init__(self) -> None:
+        """Initialise les compteurs."""
+        self.endpoints: dict[str, EndpointStats] = {}
+        self.cycles = 0
+        self.last_cycle_duration: float | None = None
+        self.cycle_latency = LatencyHistogram()
+        self.trace = CycleTrace()
+        self._sinks: list[MetricsSink] = []
+
+    def add_sink(self, sink: MetricsSink) -> Callable[[], None]:
+        """Ajoute un puits de métriques ; retourne une fonction de retrait."""
+        self._sinks.append(sink)
+        return lambda: self._sinks.remove(sink)
+
+    def record_request(self, record: RequestRecord) -> None:
+        """Enregistre une tentative de requête (observateur du client API)."""
+        stats = self.endpoints.get(record.endpoint)
+        if stats is None:
+            stats = self.endpoints[record.endpoint] = EndpointStats()
+        stats.requests += 1
+        stats.latency.observe(record.duration)
+        if record.attempt > 1:
+            stats.retries += 1
+        if record.error is not None:
+            stats.errors[record.error] += 1
+        elif record.code not in (0, None):
+            stats.errors[str(record.code)] += 1
+        self.trace.record_request(record)
+
+        for sink in self._sinks:
+            sink.record_request(record)
+
+    def begin_cycle(self) -> None:
+        """Signale le début d'un cycle de mise à jour."""
+        self.trace.begin()
+
+    def record_cycle(self, duration: float, devices: int, error: str | None = None) -> None:
+        """Enregistre la durée d'un cycle de mise à jour complet."""
+        self.cycles += 1
+        self.last_cycle_duration = duration
+        self.cycle_latency.observe(duration)
+        self.trace.end(duration, devices, error)
+
+        for sink in self._sinks:
+            sink.record_cycle(duration, devices)
+
+    @property
+    def total_requests(self) -> int:
+        """Nombre total de requêtes."""
+        return sum(stats.requests for stats in self.endpoints.values())
+
+    @property
+    def total_errors(self) -> int:
+        """Nombre total de réponses en erreur."""
+        return sum(sum(stats.errors.values()) for stats in self.endpoints.values())
+
+    @property
+    def total_retries(self) -> int:
+        """Nombre total de nouvelles tentatives."""
+        return sum(stats.retries for stats in self.endpoints.values())
+
+    def as_dict(self) -> dict:
+        """Représentation exportable de toutes les métriques."""
+        return {
+            "cycles": self.cycles,
+            "last_cycle_duration": self.last_cycle_duration,
+            "cycle_duration_p95": self.cycle_latency.percentile(95),
+            "endpoints": {
+                endpoint: stats.as_dict() for endpoint, stats in self.endpoints.items()
+            },
+        }
@@ -0,0 +1,315 @@
+"""Client Modbus TCP local pour l'intégration Big Blue.
+
+Alternative au cloud Powafree : la batterie est lue directement sur le réseau
+local (fonction 0x03, lecture de registres de maintien). Les registres sont
+regroupés en lectures contiguës et traduits en clés Powafree, si bien que le
+coordinateur et la table des champs (fields.py) les traitent exactement comme
+une réponse de /api/devices/last_data.
+
+Le client expose la même interface que BigBlueAPIClient pour ce qu'en utilise
+le coordinateur. Les paramètres (mode, seuil de décharge) ne sont pas
+disponibles en local.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import struct
+import time
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+from .api import BigBlueApiError, BigBlueConnectionError, RequestListener, RequestRecord
+from .const import (
+    DEFAULT_PORT,
+    DEFAULT_UNIT_ID,
+    MODBUS_MAX_GAP,
+    MODBUS_MAX_REGISTERS,
+    MODBUS_RETRIES,
+    MODBUS_TIMEOUT,
+    REGISTER_BATTERY_CAPACITY,
+    REGISTER_BATTERY_CURRENT,
+    REGISTER_BATTERY_SOC,
+    REGISTER_BATTERY_STATUS,
+    REGISTER_BATTERY_TEMPERATURE,
+    REGISTER_BATTERY_VOLTAGE,
+)
+from .fields import TELEMETRY_FIELDS
+from .throttle import LogThrottle
+
+_LOGGER = logging.getLogger(__name__)
+
+# "Endpoint" des lectures Modbus dans les métriques (voir metrics.py)
+ENDPOINT_MODBUS_READ = "modbus/read_holding_registers"
+
+FUNCTION_READ_HOLDING_REGISTERS = 0x03
+PROTOCOL_ID = 0
+# En-tête MBAP : transaction, protocole, longueur, unité
+_MBAP = struct.Struct(">HHHB")
+_READ_REQUEST = struct.Struct(">BHH")
+
+
+class BigBlueModbusError(BigBlueApiError):
+    """Réponse d'exception Modbus (code d'exception 1 à 11)."""
+
+
+class ModbusRegister(NamedTuple):
+    """Registre de maintien et clé Powafree correspondante."""
+
+    api_key: str  # Clé de /api/devices/last_data (voir fields.TELEMETRY_FIELDS)
+    address: int
+    signed: bool = False  # Entier signé sur 16 bits (complément à deux)
+
+
+# Les valeurs brutes sont supposées dans les unités du cloud (dixièmes de V,
+# de %, de °C, Wh) : la table des champs applique les mêmes échelles.
+MODBUS_REGISTERS: tuple[ModbusRegister, ...] = (
+    ModbusRegister("totalVoltage", REGISTER_BATTERY_VOLTAGE),
+    ModbusRegister("totalCurrent", REGISTER_BATTERY_CURRENT, signed=True),
+    ModbusRegister("totalSoc", REGISTER_BATTERY_SOC),
+    ModbusRegister("maxTemperature", REGISTER_BATTERY_TEMPERATURE, signed=True),
+    ModbusRegister("status", REGISTER_BATTERY_STATUS),
+    ModbusRegister("totalRemainingCapacity", REGISTER_BATTERY_CAPACITY),
+)
+
+
+def plan_reads(
+    registers: tuple[ModbusRegister, ...],
+    max_count: int = MODBUS_MAX_REGISTERS,
+    max_gap: int = MODBUS_MAX_GAP,
+) -> tuple[tuple[int, int], ...]:
+    """Regroupe les registres en lectures (adresse, nombre) aussi peu nombreuses que possible.
+
+    Deux registres sont lus ensemble s'ils sont séparés d'au plus `max_gap`
+    registres inutilisés et que la lecture ne dépasse pas `max_count` registres.
+    """
+    reads: list[list[int]] = []
+    for address in sorted({register.address for register in registers}):
+        if reads:
+            start, count = reads[-1]
+            end = start + count
+            if address - end <= max_gap and address - start + 1 <= max_count:
+                reads[-1][1] = address - start + 1
+                continue
+        reads.append([address, 1])
+    return tuple((start, count) for start, count in reads)
+
+
+class BigBlueModbusClient:
+    """Client Modbus TCP d'une batterie Big Blue sur le réseau local."""
+
+    # Mode et seuil de décharge ne sont accessibles que par le cloud
+    supports_settings = False
+
+    def __init__(
+        self,
+        host: str,
+        port: int = DEFAULT_PORT,
+        unit_id: int = DEFAULT_UNIT_ID,
+        registers: tuple[ModbusRegister, ...] = MODBUS_REGISTERS,
+        timeout: float = MODBUS_TIMEOUT,
+    ) -> None:
+        """Initialise le client (la connexion est ouverte à la première lecture)."""
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self.timeout = timeout
+        # Identifiant de l'appareil, stable pour un hôte et une unité donnés
+        self.device_mac = f"modbus-{host}-{port}-{unit_id}"
+        self.registers = registers
+        self._reads = plan_reads(registers)
+        # Seuls les champs couverts par un registre ont un capteur
+        api_keys = {register.api_key for register in registers}
+        self.field_keys = frozenset(
+            field.key for field in TELEMETRY_FIELDS if field.api_key in api_keys
+        )
+        # Les autres sont lus comme absents (None) et non à leur valeur par défaut
+        self._missing_keys = tuple(
+            field.api_key for field in TELEMETRY_FIELDS if field.api_key not in api_keys
+        )
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        # Une transaction à la fois sur la connexion
+        self._lock = asyncio.Lock()
+        self._transaction = 0
+        self._listeners: list[RequestListener] = []
+        self._log_throttle = LogThrottle(_LOGGER)
+
+    async def __aenter__(self):
+        """Context manager entry."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        await self.async_close()
+
+    @property
+    def connected(self) -> bool:
+        """Indique si la connexion TCP est ouverte."""
+        return self._writer is not None and not self._writer.is_closing()
+
+    def add_request_listener(self, listener: RequestListener) -> Callable[[], None]:
+        """Abonne un observateur (durées, métriques) à chaque lecture.
+
+        Retourne une fonction de désabonnement.
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    async def _async_connect(self) -> None:
+        """Ouvre la connexion TCP si nécessaire."""
+        if self.connected:
+            return
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+        except (OSError, asyncio.TimeoutError) as err:
+            raise BigBlueConnectionError(
+                f"Connexion Modbus impossible à {self.host}:{self.port}: {err}"
+            ) from err
+        _LOGGER.debug("🔌 Connexion Modbus ouverte vers %s:%s", self.host, self.port)
+
+    async def async_close(self) -> None:
+        """Ferme la connexion TCP."""
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def async_ensure_token(self) -> bool:
+        """Équivalent local de l'authentification : la connexion est-elle possible ?"""
+        try:
+            await self._async_connect()
+        except BigBlueConnectionError as err:
+            self._log_throttle.error("connect", "❌ %s", err)
+            return False
+        return True
+
+    async def authenticate(self) -> bool:
+        """Vérifie la connexion et la lecture des registres (assistant de configuration)."""
+        try:
+            await self.async_get_last_data(self.device_mac)
+        except BigBlueApiError as err:
+            _LOGGER.error("❌ Échec de la lecture Modbus: %s", err)
+            return False
+        return True
+
+    async def read_holding_registers(self, address: int, count: int) -> list[int]:
+        """Lit `count` registres de maintien à partir de `address` (valeurs non signées).
+
+        Une connexion perdue est rouverte pour une nouvelle tentative ; lève
+        BigBlueConnectionError si elle échoue encore, BigBlueModbusError pour
+        une réponse d'exception.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            start = time.monotonic()
+            failure: BigBlueApiError | None = None
+            code: int | None = None
+            values: list[int] = []
+            try:
+                async with self._lock:
+                    await self._async_connect()
+                    values = await asyncio.wait_for(
+                        self._transact(address, count), self.timeout
+                    )
+                code = 0
+            except BigBlueModbusError as err:
+                failure = err
+                code = err.code
+            except BigBlueConnectionError as err:
+                failure = err
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as err:
+                # La connexion n'est plus dans un état sûr : elle sera rouverte
+                await self.async_close()
+                failure = BigBlueConnectionError(
+                    f"{type(err).__name__} pour {self.host}:{self.port}: {err}"
+                )
+
+            if self._listeners:
+                record = RequestRecord(
+                    ENDPOINT_MODBUS_READ,
+                    time.monotonic() - start,
+                    code,
+                    attempt,
+                    type(failure).__name__ if isinstance(failure, BigBlueConnectionError) else None,
+                    self.device_mac,
+                )
+                for listener in self._listeners:
+                    listener(record)
+
+            if failure is None:
+                return values
+            if isinstance(failure, BigBlueModbusError) or attempt > MODBUS_RETRIES:
+                raise failure
+
+    async def _transact(self, address: int, count: int) -> list[int]:
+        """Envoie une requête 0x03 et décode la réponse (verrou déjà pris)."""
+        self._transaction = (self._transaction + 1) & 0xFFFF
+        pdu = _READ_REQUEST.pack(FUNCTION_READ_HOLDING_REGISTERS, address, count)
+        self._writer.write(
+            _MBAP.pack(self._transaction, PROTOCOL_ID, len(pdu) + 1, self.unit_id) + pdu
+        )
+        await self._writer.drain()
+
+        while True:
+            transaction, protocol, length, _unit = _MBAP.unpack(
+                await self._reader.readexactly(_MBAP.size)
+            )
+            body = await self._reader.readexactly(length - 1)
+            # Réponse tardive à une transaction abandonnée : ignorée
+            if transaction == self._transaction and protocol == PROTOCOL_ID:
+                break
+
+        function = body[0]
+        if function == FUNCTION_READ_HOLDING_REGISTERS | 0x80:
+            raise BigBlueModbusError(
+                f"Exception Modbus {body[1]} en lecture de {count} registre(s) à 0x{address:04X}",
+                body[1],
+            )
+        if function != FUNCTION_READ_HOLDING_REGISTERS or body[1] != 2 * count:
+            raise BigBlueConnectionError(f"Réponse Modbus invalide (fonction {function})")
+        return list(struct.unpack(f">{count}H", body[2:2 + 2 * count]))
+
+    async def get_devices(self) -> list:
+        """Un client Modbus correspond à une seule batterie."""
+        return [{"bleMac": self.device_mac, "name": f"Big Blue {self.host}"}]
+
+    async def async_get_last_data(self, device_mac: str) -> dict:
+        """Lit la télémétrie et la retourne avec les clés de /api/devices/last_data.
+
+        Les clés sans registre valent None (mesure indisponible en local).
+
+        Lève BigBlueConnectionError ou BigBlueModbusError en cas d'échec.
+        """
+        words: dict[int, int] = {}
+        for address, count in self._reads:
+            values = await self.read_holding_registers(address, count)
+            words.update(zip(range(address, address + count), values))
+
+        data: dict[str, Any] = dict.fromkeys(self._missing_keys)
+        for register in self.registers:
+            value = words[register.address]
+            if register.signed and value >= 0x8000:
+                value -= 0x10000
+            data[register.api_key] = value
+        data["last_update"] = asyncio.get_running_loop().time()
+        return data
+
+    async def get_device_settings(self, device_mac: str) -> dict:
+        """Aucun paramètre n'est lisible en local : les valeurs par défaut s'appliquent."""
+        return {}
+
+    async def async_patch_settings(
+        self,
+        device_mac: str,
+        patch: dict[str, Any],
+        settings: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Les paramètres ne sont modifiables que par le cloud Powafree."""
+        raise BigBlueApiError("Paramètres non disponibles en Modbus local")
@@ -6,12 +6,11 @@ from typing import Any
 
 from homeassistant.components.number import NumberEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.helpers import translation
 
 from .const import DOMAIN
+from .entity import BigBlueDeviceEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,11 +19,18 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, asyn
     """Configure les entités numériques Big Blue."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
     
-    entities = []
+    # Transport local : les paramètres ne sont ni lus ni modifiables
+    if not coordinator.api_client.supports_settings:
+        return
     
-    if coordinator.data:
-        for device_mac, device_info in coordinator.data.items():
-            if device_mac == "default" or device_info.get("offline", False):
+    @callback
+    def _async_add_devices(device_macs: list[str]) -> None:
+        """Crée les entités numériques des batteries nouvellement découvertes."""
+        entities = []
+        for device_mac in device_macs:
+            device_info = coordinator.data.get(device_mac, {})
+            # Les appareils hors ligne sont créés : l'entité sera indisponible
+            if device_mac == "default":
                 continue
             
             device_name = device_info.get("device_name", f"Big Blue {device_mac}")
@@ -33,17 +39,21 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, asyn
             entities.append(
                 BigBlueDischargeThresholdNumber(coordinator, device_mac, f"Seuil Décharge {device_name}")
             )
+        
+        _LOGGER.info("Création de %d entités numériques", len(entities))
+        async_add_entities(entities)
     
-    _LOGGER.info(f"Création de {len(entities)} entités numériques")
-    async_add_entities(entities)
+    # Ajout des batteries présentes puis de celles découvertes plus tard
+    config_entry.async_on_unload(coordinator.async_add_device_listener(_async_add_devices))
 
 
-class BigBlueDischargeThresholdNumber(CoordinatorEntity, NumberEntity):
+class BigBlueDischargeThresholdNumber(BigBlueDeviceEntity, NumberEntity):
     """Entité numérique du seuil de décharge."""
     
+    _watched_keys = ("discharge_threshold",)
+    
     def __init__(self, coordinator, device_mac: str, name: str):
-        super().__init__(coordinator)
-        self._device_mac = device_mac
+        super().__init__(coordinator, device_mac)
         self._attr_name = name
         self._attr_unique_id = f"bigblue_{device_mac}_discharge_threshold"
         self._attr_icon = "mdi:battery-alert"
@@ -57,37 +67,26 @@ class BigBlueDischargeThresholdNumber(CoordinatorEntity, NumberEntity):
     @property
     def native_value(self) -> float:
         """Retourne le seuil de décharge actuel."""
-        if self.coordinator.data and self._device_mac:
-            device_data = self.coordinator.data.get(self._device_mac, {})
-            if device_data and "discharge_threshold" in device_data:
-                return device_data["discharge_threshold"]
+        snapshot = self.snapshot
+        if snapshot is not None:
+            return snapshot.discharge_threshold
         return 10.0  # Valeur par défaut
     
-    @property
-    def device_info(self):
-        """Retourne les informations de l'appareil."""
-        return {
-            "identifiers": {(DOMAIN, self._device_mac)},
-            "name": self.coordinator.data.get(self._device_mac, {}).get("device_name", f"Big Blue {self._device_mac}"),
-            "manufacturer": "Big Blue",
-            "model": "Battery System",
-            "sw_version": "1.0.0"
-        }
-    
     async def async_set_native_value(self, value: float) -> None:
         """Définit le seuil de décharge."""
         try:
-            _LOGGER.info(f"🔧 Modification du seuil de décharge à {value}% pour {self._device_mac}")
+            _LOGGER.info("🔧 Modification du seuil de décharge à %s%% pour %s", value, self._device_mac)
             
-            # Appeler l'API pour mettre à jour le seuil
-            success = await self.coordinator.api_client.set_discharge_threshold(self._device_mac, int(value))
+            # Affiché immédiatement ; les valeurs successives du curseur sont
+            # regroupées (la dernière l'emporte) et annulées en cas de refus
+            success = await self.coordinator.async_set_settings(
+                self._device_mac, discharge_threshold=int(value)
+            )
             
             if success:
-                _LOGGER.info(f"✅ Seuil de décharge mis à jour à {value}%")
-                # Forcer la mise à jour des données
-                await self.coordinator.async_request_refresh()
+                _LOGGER.info("✅ Seuil de décharge mis à jour à %s%%", value)
             else:
-                _LOGGER.error(f"❌ Échec mise à jour seuil de décharge à {value}%")
+                _LOGGER.error("❌ Échec mise à jour seuil de décharge à %s%%", value)
                 
         except Exception as err:
-            _LOGGER.error(f"❌ Erreur modification seuil de décharge: {err}")
+            _LOGGER.error("❌ Erreur modification seuil de décharge: %s", err)
@@ -0,0 +1,86 @@
+"""Planification adaptative de l'intervalle de mise à jour Big Blue."""
+from __future__ import annotations
+
+from .const import (
+    ACTIVITY_POWER_STEP,
+    ACTIVITY_PV_STEP,
+    ACTIVITY_SOC_STEP,
+)
+
+# Facteurs appliqués à l'intervalle courant
+FAST_FACTOR = 0.5  # Transition rapide : on resserre fortement
+IDLE_FACTOR = 1.5  # Nuit / batterie au repos : on espace les requêtes
+RELAX_FACTOR = 1.25  # Retour progressif vers l'intervalle par défaut
+
+# En dessous de ce niveau d'activité, une batterie sans PV est considérée au repos
+IDLE_ACTIVITY = 0.1
+
+
+class AdaptivePollScheduler:
+    """Calcule l'intervalle de mise à jour à partir de l'activité récente.
+
+    L'activité d'un appareil est la plus grande variation observée entre deux
+    cycles (puissance, SOC, puissance PV), normalisée par un pas de référence.
+    Une activité >= 1 resserre l'intervalle, une installation au repos sans
+    production PV l'allonge, sinon l'intervalle revient vers sa valeur par défaut.
+    """
+
+    def __init__(self, default_interval: float, min_interval: float, max_interval: float) -> None:
+        """Initialise le planificateur."""
+        self.min_interval = min(min_interval, max_interval)
+        self.max_interval = max(min_interval, max_interval)
+        self.default_interval = min(max(default_interval, self.min_interval), self.max_interval)
+        self.interval = self.default_interval
+        self.activity = 0.0
+        self._previous: dict[str, tuple[float, float, float]] = {}
+
+    def update(self, devices_data: dict[str, dict]) -> float:
+        """Met à jour l'intervalle avec les données du dernier cycle et le retourne."""
+        activity = 0.0
+        has_history = False
+        producing = False
+        samples: dict[str, tuple[float, float, float]] = {}
+
+        for device_mac, device_data in devices_data.items():
+            power = device_data.get("power")
+            if power is None:
+                # Modbus local : pas de registre de puissance, estimée par U x I
+                power = (device_data.get("voltage") or 0) * (device_data.get("current") or 0)
+            sample = (
+                float(power or 0),
+                float(device_data.get("soc") or 0),
+                float(device_data.get("pv_total_power") or 0),
+            )
+            samples[device_mac] = sample
+            if sample[2] > 0:
+                producing = True
+
+            previous = self._previous.get(device_mac)
+            if previous is None:
+                continue
+            has_history = True
+            activity = max(
+                activity,
+                abs(sample[0] - previous[0]) / ACTIVITY_POWER_STEP,
+                abs(sample[1] - previous[1]) / ACTIVITY_SOC_STEP,
+                abs(sample[2] - previous[2]) / ACTIVITY_PV_STEP,
+            )
+
+        # Les appareils absents de ce cycle sont oubliés
+        self._previous = samples
+        self.activity = activity
+
+        if not has_history:
+            return self.interval
+
+        if activity >= 1:
+            interval = self.interval * FAST_FACTOR
+        elif not producing and activity < IDLE_ACTIVITY:
+            interval = self.interval * IDLE_FACTOR
+        elif self.interval < self.default_interval:
+            interval = min(self.interval * RELAX_FACTOR, self.default_interval)
+        else:
+            interval = max(self.interval / RELAX_FACTOR, self.default_interval)
+
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+        return self.interval
@@ -2,19 +2,142 @@
 from __future__ import annotations
 
 import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
 from typing import Any
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfEnergy, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.helpers import translation
 
-from .const import DOMAIN
+from .api import (
+    ENDPOINT_DEVICE_LIST,
+    ENDPOINT_LAST_DATA,
+    ENDPOINT_LOGIN,
+    ENDPOINT_SETTINGS_DOWNLOAD,
+    ENDPOINT_SETTINGS_UPLOAD,
+)
+from .const import CONF_TRANSPORT, DOMAIN, HUB_SENSOR_UPDATE_INTERVAL, TRANSPORT_LOCAL
+from .entity import BigBlueDeviceEntity
+from .fields import SENSOR_FIELDS, SETTINGS_FIELDS
+from .modbus import ENDPOINT_MODBUS_READ
 
 _LOGGER = logging.getLogger(__name__)
 
+MODE_NAMES = {
+    1: "Mode 1 - Priorité batterie",
+    2: "Mode 2 - Priorité micro-onduleur",
+    3: "Mode 3 - Mode personnalisé",
+}
+
+
+@dataclass(frozen=True, kw_only=True)
+class BigBlueSensorEntityDescription(SensorEntityDescription):
+    """Description d'un capteur de batterie Big Blue."""
+    
+    value_fn: Callable[[Any], Any] | None = None  # Conversion de la valeur publiée
+    # Champs de la télémétrie nécessaires au capteur (voir BigBlueModbusClient.field_keys)
+    requires: tuple[str, ...] = ()
+
+
+def _mode_name(mode: int) -> str:
+    """Convertit le numéro de mode en nom."""
+    return MODE_NAMES.get(mode, f"Mode {mode}")
+
+
+# Clés des champs issus des paramètres
+SETTINGS_KEYS = frozenset(field.key for field in SETTINGS_FIELDS)
+
+# Une description par champ de la table, partagée par toutes les batteries
+SENSOR_DESCRIPTIONS: tuple[BigBlueSensorEntityDescription, ...] = tuple(
+    BigBlueSensorEntityDescription(
+        key=field.key,
+        name=field.name,
+        icon=field.icon,
+        native_unit_of_measurement=field.unit,
+        device_class=SensorDeviceClass(field.device_class) if field.device_class else None,
+        value_fn=_mode_name if field.key == "current_mode" else None,
+        requires=() if field.key in SETTINGS_KEYS else (field.key,),
+    )
+    for field in SENSOR_FIELDS
+) + (
+    # Indicateurs dérivés, calculés par le coordinateur (analytics.py)
+    BigBlueSensorEntityDescription(
+        key="time_to_empty",
+        name="Autonomie restante",
+        icon="mdi:battery-arrow-down",
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        requires=("power", "remaining_capacity", "rated_capacity"),
+    ),
+    BigBlueSensorEntityDescription(
+        key="time_to_full",
+        name="Temps avant charge complète",
+        icon="mdi:battery-arrow-up",
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        requires=("power", "remaining_capacity", "rated_capacity"),
+    ),
+    BigBlueSensorEntityDescription(
+        key="round_trip_efficiency",
+        name="Rendement aller-retour",
+        icon="mdi:swap-vertical-circle-outline",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        requires=("power",),
+    ),
+    BigBlueSensorEntityDescription(
+        key="self_consumption",
+        name="Taux d'autoconsommation",
+        icon="mdi:home-lightning-bolt-outline",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        requires=("daily_generation", "daily_output_energy"),
+    ),
+    BigBlueSensorEntityDescription(
+        key="charged_energy",
+        name="Énergie chargée",
+        icon="mdi:battery-plus-variant",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        requires=("power",),
+    ),
+    BigBlueSensorEntityDescription(
+        key="discharged_energy",
+        name="Énergie déchargée",
+        icon="mdi:battery-minus-variant",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        requires=("power",),
+    ),
+)
+
+# Endpoints suivis par les capteurs de latence (clé de traduction, libellé)
+ENDPOINT_LABELS = {
+    ENDPOINT_LOGIN: "login",
+    ENDPOINT_DEVICE_LIST: "device_list",
+    ENDPOINT_LAST_DATA: "last_data",
+    ENDPOINT_SETTINGS_DOWNLOAD: "settings_download",
+    ENDPOINT_SETTINGS_UPLOAD: "settings_upload",
+}
+MODBUS_ENDPOINT_LABELS = {
+    ENDPOINT_MODBUS_READ: "modbus_read",
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -24,296 +147,238 @@ async def async_setup_entry(
     """Configure les capteurs Big Blue."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
     
-    entities = []
+    # Latences des endpoints du transport utilisé
+    endpoint_labels = ENDPOINT_LABELS if coordinator.api_client.supports_settings else MODBUS_ENDPOINT_LABELS
+    
+    # Diagnostic du compte (appareil "hub")
+    async_add_entities([
+        BigBluePollIntervalSensor(coordinator, config_entry),
+        BigBlueCycleDurationSensor(coordinator, config_entry),
+        BigBlueApiCounterSensor(coordinator, config_entry, "api_requests", "total_requests", "mdi:api"),
+        BigBlueApiCounterSensor(coordinator, config_entry, "api_errors", "total_errors", "mdi:alert-circle-outline"),
+        BigBlueApiCounterSensor(coordinator, config_entry, "api_retries", "total_retries", "mdi:replay"),
+        *(
+            BigBlueEndpointLatencySensor(coordinator, config_entry, endpoint, label)
+            for endpoint, label in endpoint_labels.items()
+        ),
+    ])
     
-    # Créer des capteurs pour chaque batterie
-    devices_data = coordinator.data
-    if not devices_data:
+    if not coordinator.data:
         # Si pas de données, ne pas créer de capteurs par défaut
-        _LOGGER.warning("⚠️ Aucune donnée du coordinateur - Aucun capteur créé")
-        return entities
-    else:
-        for device_mac, device_info in devices_data.items():
+        _LOGGER.warning("⚠️ Aucune donnée du coordinateur - Aucun capteur de batterie créé")
+    
+    # Transport local : seuls les capteurs dont les champs sont lus en Modbus
+    # sont créés (indicateurs dérivés compris)
+    api_client = coordinator.api_client
+    field_keys = api_client.field_keys
+    descriptions = tuple(
+        description
+        for description in SENSOR_DESCRIPTIONS
+        if (field_keys is None or field_keys.issuperset(description.requires))
+        and (api_client.supports_settings or description.key not in SETTINGS_KEYS)
+    )
+    
+    @callback
+    def _async_add_devices(device_macs: list[str]) -> None:
+        """Crée les capteurs des batteries nouvellement découvertes."""
+        entities = []
+        for device_mac in device_macs:
+            device_info = coordinator.data.get(device_mac, {})
             device_name = device_info.get("device_name", f"Big Blue {device_mac}")
             
-            # Capteurs pour cette batterie
+            # Capteurs pour cette batterie (descriptions partagées)
             device_entities = [
-                # Batterie - Noms comme Storcube
-                BigBlueSOCSensor(coordinator, "soc", f"État de charge {device_name}", "%", "battery", device_mac),
-                BigBlueSOHSensor(coordinator, "soh", f"État de santé {device_name}", "%", "battery", device_mac),
-                BigBlueBatteryVoltageSensor(coordinator, "voltage", f"Tension {device_name}", "V", "voltage", device_mac),
-                BigBlueBatteryCurrentSensor(coordinator, "current", f"Courant {device_name}", "A", "current", device_mac),
-                BigBlueBatteryPowerSensor(coordinator, "power", f"Puissance {device_name}", "W", "power", device_mac),
-                BigBlueRemainingCapacitySensor(coordinator, "remaining_capacity", f"Capacité Restante {device_name}", "kWh", "energy", device_mac),
-                BigBlueRatedCapacitySensor(coordinator, "rated_capacity", f"Capacité Nominale {device_name}", "kWh", "energy", device_mac),
-                
-                # Panneaux solaires - Noms comme Storcube
-                BigBluePV1VoltageSensor(coordinator, "pv1_voltage", f"Tension PV1 {device_name}", "V", "voltage", device_mac),
-                BigBluePV1CurrentSensor(coordinator, "pv1_current", f"Courant PV1 {device_name}", "A", "current", device_mac),
-                BigBluePV1PowerSensor(coordinator, "pv1_power", f"Puissance PV1 {device_name}", "W", "power", device_mac),
-                BigBluePV2VoltageSensor(coordinator, "pv2_voltage", f"Tension PV2 {device_name}", "V", "voltage", device_mac),
-                BigBluePV2CurrentSensor(coordinator, "pv2_current", f"Courant PV2 {device_name}", "A", "current", device_mac),
-                BigBluePV2PowerSensor(coordinator, "pv2_power", f"Puissance PV2 {device_name}", "W", "power", device_mac),
-                BigBluePVTotalPowerSensor(coordinator, "pv_total_power", f"Puissance PV Totale {device_name}", "W", "power", device_mac),
-                
-                # Production d'énergie - Noms comme Storcube
-                BigBlueDailyGenerationSensor(coordinator, "daily_generation", f"Énergie Solaire {device_name}", "kWh", "energy", device_mac),
-                BigBlueTotalGenerationSensor(coordinator, "total_generation", f"Énergie Solaire Totale {device_name}", "kWh", "energy", device_mac),
-                BigBlueDailyOutputEnergySensor(coordinator, "daily_output_energy", f"Énergie Sortie {device_name}", "kWh", "energy", device_mac),
-                BigBlueTotalOutputEnergySensor(coordinator, "total_output_energy", f"Énergie Sortie Totale {device_name}", "kWh", "energy", device_mac),
-                
-                # Température
-                BigBlueMaxTemperatureSensor(coordinator, "max_temperature", f"Température Max {device_name}", "°C", "temperature", device_mac),
-                BigBlueMinTemperatureSensor(coordinator, "min_temperature", f"Température Min {device_name}", "°C", "temperature", device_mac),
-                
-                # CO2 et économies
-                BigBlueDailyCO2SavingsSensor(coordinator, "daily_co2_savings", f"Économies CO2 {device_name}", "g", "weight", device_mac),
-                
-                # Temps de fonctionnement
-                BigBlueDailyRuntimeSensor(coordinator, "daily_runtime", f"Temps Fonctionnement {device_name}", "h", "duration", device_mac),
-                BigBlueTotalRuntimeSensor(coordinator, "total_runtime", f"Temps Total {device_name}", "h", "duration", device_mac),
-                
-                # Mode actuel
-                BigBlueCurrentModeSensor(coordinator, "current_mode", f"Mode Actuel {device_name}", None, None, device_mac),
-                
+                BigBlueSensor(coordinator, description, device_mac, device_name)
+                for description in descriptions
             ]
             
             entities.extend(device_entities)
+        
+        _LOGGER.info("Création de %d capteurs", len(entities))
+        async_add_entities(entities)
     
-    _LOGGER.info(f"Création de {len(entities)} capteurs")
-    async_add_entities(entities)
+    # Ajout des batteries présentes puis de celles découvertes plus tard
+    config_entry.async_on_unload(coordinator.async_add_device_listener(_async_add_devices))
 
 
-class BigBlueSensor(CoordinatorEntity, SensorEntity):
-    """Capteur de base pour Big Blue."""
+class BigBlueSensor(BigBlueDeviceEntity, SensorEntity):
+    """Capteur d'une batterie Big Blue, décrit par une BigBlueSensorEntityDescription."""
     
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str = None, device_mac: str = None):
-        """Initialise le capteur."""
-        super().__init__(coordinator)
-        self._key = key
-        self._device_mac = device_mac
-        self._attr_name = name  # Nom complet déjà fourni
-        self._attr_native_unit_of_measurement = unit
-        self._attr_device_class = device_class
-        self._attr_unique_id = f"bigblue_{device_mac}_{key}" if device_mac else f"bigblue_{key}"
-        self._translation_key = key
+    entity_description: BigBlueSensorEntityDescription
     
-    @property
-    def device_info(self):
-        """Retourne les informations de l'appareil."""
-        if self._device_mac:
-            return {
-                "identifiers": {(DOMAIN, self._device_mac)},
-                "name": self.coordinator.data.get(self._device_mac, {}).get("device_name", f"Big Blue {self._device_mac}"),
-                "manufacturer": "Big Blue",
-                "model": "Battery System",
-                "sw_version": "1.0.0"
-            }
-        return None
+    def __init__(self, coordinator, description: BigBlueSensorEntityDescription, device_mac: str, device_name: str):
+        """Initialise le capteur."""
+        super().__init__(coordinator, device_mac)
+        self.entity_description = description
+        self._watched_keys = (description.key,)
+        self._attr_name = f"{description.name} {device_name}"
+        self._attr_unique_id = f"bigblue_{device_mac}_{description.key}"
     
     @property
     def native_value(self) -> Any:
         """Retourne la valeur du capteur."""
-        if self.coordinator.data and self._device_mac:
-            device_data = self.coordinator.data.get(self._device_mac, {})
-            if device_data and self._key in device_data:
-                value = device_data[self._key]
-                # Vérifier si le device est hors ligne
-                if device_data.get("offline", False):
-                    return None  # Retourner None pour les devices hors ligne
-                return value
+        snapshot = self.snapshot
+        if snapshot is None or snapshot.offline:
+            return None
+        value = getattr(snapshot, self.entity_description.key)
+        value_fn = self.entity_description.value_fn
+        if value is None or value_fn is None:
+            return value
+        return value_fn(value)
+    
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Signale une valeur issue du cache local, en attente du cloud."""
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.stale:
+            return {"stale": True}
         return None
 
 
-# Capteurs de batterie
-class BigBlueSOCSensor(BigBlueSensor):
-    """Capteur d'état de charge total."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:battery"
-
-
-class BigBlueSOHSensor(BigBlueSensor):
-    """Capteur d'état de santé."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:heart-pulse"
-
-
-class BigBlueBatteryVoltageSensor(BigBlueSensor):
-    """Capteur de tension batterie."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:lightning-bolt"
-
-
-class BigBlueBatteryCurrentSensor(BigBlueSensor):
-    """Capteur de courant batterie."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:current-ac"
-
-
-class BigBlueBatteryPowerSensor(BigBlueSensor):
-    """Capteur de puissance batterie."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:power"
-
-
-class BigBlueRemainingCapacitySensor(BigBlueSensor):
-    """Capteur de capacité restante."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:battery-50"
-
-
-class BigBlueRatedCapacitySensor(BigBlueSensor):
-    """Capteur de capacité nominale."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:battery"
-
-
-# Capteurs panneaux solaires
-class BigBluePV1VoltageSensor(BigBlueSensor):
-    """Capteur de tension PV1."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:solar-power"  # Icône soleil comme Storcube
-
-
-class BigBluePV1CurrentSensor(BigBlueSensor):
-    """Capteur de courant PV1."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:solar-power"  # Icône soleil comme Storcube
-
-
-class BigBluePV1PowerSensor(BigBlueSensor):
-    """Capteur de puissance PV1."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:solar-power"  # Icône soleil comme Storcube
-
-
-class BigBluePV2VoltageSensor(BigBlueSensor):
-    """Capteur de tension PV2."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:solar-power"  # Icône soleil comme Storcube
-
-
-class BigBluePV2CurrentSensor(BigBlueSensor):
-    """Capteur de courant PV2."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:solar-power"  # Icône soleil comme Storcube
-
-
-class BigBluePV2PowerSensor(BigBlueSensor):
-    """Capteur de puissance PV2."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:solar-power"
-
-
-class BigBluePVTotalPowerSensor(BigBlueSensor):
-    """Capteur de puissance PV totale."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:solar-power-variant"
-
-
-# Capteurs de production
-class BigBlueDailyGenerationSensor(BigBlueSensor):
-    """Capteur de production journalière."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:solar-power"  # Icône soleil comme Storcube
-
-
-class BigBlueTotalGenerationSensor(BigBlueSensor):
-    """Capteur de production totale."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:solar-power"  # Icône soleil comme Storcube
-
-
-class BigBlueDailyOutputEnergySensor(BigBlueSensor):
-    """Capteur d'énergie sortie journalière."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:lightning-bolt"  # Icône éclair comme Storcube
-
-
-class BigBlueTotalOutputEnergySensor(BigBlueSensor):
-    """Capteur d'énergie sortie totale."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:lightning-bolt"  # Icône éclair comme Storcube
-
-
-# Capteurs de température
-class BigBlueMaxTemperatureSensor(BigBlueSensor):
-    """Capteur de température maximale."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:thermometer-high"
-
-
-class BigBlueMinTemperatureSensor(BigBlueSensor):
-    """Capteur de température minimale."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:thermometer-low"
-
-
-# Capteurs CO2 et économies
-class BigBlueDailyCO2SavingsSensor(BigBlueSensor):
-    """Capteur d'économies CO2 journalières."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:leaf"
-
-
-# Capteurs de temps de fonctionnement
-class BigBlueDailyRuntimeSensor(BigBlueSensor):
-    """Capteur de temps de fonctionnement journalier."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:clock-outline"
-
-
-class BigBlueTotalRuntimeSensor(BigBlueSensor):
-    """Capteur de temps de fonctionnement total."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:clock"
+class BigBlueHubSensor(CoordinatorEntity, SensorEntity):
+    """Capteur de diagnostic rattaché à l'entrée (appareil hub : compte Powafree ou Modbus local)."""
+    
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    # Nom traduit (entity.sensor.<clé> des fichiers de traduction), précédé du nom du hub
+    _attr_has_entity_name = True
+    
+    def __init__(self, coordinator, config_entry: ConfigEntry, key: str):
+        """Initialise le capteur de diagnostic."""
+        super().__init__(coordinator)
+        self._key = key
+        self._attr_unique_id = f"bigblue_{config_entry.entry_id}_{key}"
+        self._attr_translation_key = key
+        local = config_entry.data.get(CONF_TRANSPORT) == TRANSPORT_LOCAL
+        # Seul le transport local (cycle d'une demi-seconde) espace les écritures
+        self._write_interval = HUB_SENSOR_UPDATE_INTERVAL if local else 0
+        self._last_write: float | None = None
+        self._last_available: bool | None = None
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, config_entry.entry_id)},
+            "name": config_entry.title,
+            "manufacturer": "Big Blue",
+            "model": "Modbus TCP" if local else "Powafree Cloud",
+            "entry_type": DeviceEntryType.SERVICE,
+        }
+    
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """En Modbus local, écrit l'état au plus une fois toutes les HUB_SENSOR_UPDATE_INTERVAL secondes.
+        
+        Les métriques restent cumulées à chaque cycle ; seule l'écriture dans
+        l'enregistreur est espacée. Un changement de disponibilité est
+        toujours publié immédiatement.
+        """
+        now = time.monotonic()
+        available = self.available
+        if (
+            available == self._last_available
+            and self._last_write is not None
+            and now - self._last_write < self._write_interval
+        ):
+            return
+        self._last_write = now
+        self._last_available = available
+        super()._handle_coordinator_update()
+
+
+class BigBluePollIntervalSensor(BigBlueHubSensor):
+    """Intervalle de mise à jour courant choisi par le planificateur adaptatif."""
+    
+    def __init__(self, coordinator, config_entry: ConfigEntry):
+        super().__init__(coordinator, config_entry, "poll_interval")
+        self._attr_icon = "mdi:timer-sync-outline"
+        self._attr_native_unit_of_measurement = UnitOfTime.SECONDS
+        self._attr_device_class = SensorDeviceClass.DURATION
+    
+    @property
+    def native_value(self) -> float | None:
+        """Retourne l'intervalle courant en secondes."""
+        if self.coordinator.update_interval is None:
+            return None
+        return round(self.coordinator.update_interval.total_seconds(), 1)
+    
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Retourne l'activité mesurée et les bornes du planificateur."""
+        scheduler = self.coordinator.scheduler
+        return {
+            "activity": round(scheduler.activity, 2),
+            "min_interval": scheduler.min_interval,
+            "max_interval": scheduler.max_interval,
+        }
 
 
-class BigBlueCurrentModeSensor(BigBlueSensor):
-    """Capteur du mode actuel."""
-    def __init__(self, coordinator, key: str, name: str, unit: str, device_class: str, device_mac: str = None):
-        super().__init__(coordinator, key, name, unit, device_class, device_mac)
-        self._attr_icon = "mdi:cog"
+class BigBlueCycleDurationSensor(BigBlueHubSensor):
+    """Durée du dernier cycle de mise à jour complet."""
+    
+    def __init__(self, coordinator, config_entry: ConfigEntry):
+        super().__init__(coordinator, config_entry, "cycle_duration")
+        self._attr_icon = "mdi:timer-outline"
+        self._attr_native_unit_of_measurement = UnitOfTime.SECONDS
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_state_class = SensorStateClass.MEASUREMENT
     
     @property
-    def native_value(self) -> str:
-        """Retourne le mode actuel sous forme de texte."""
-        if self.coordinator.data and self._device_mac:
-            device_data = self.coordinator.data.get(self._device_mac, {})
-            if device_data and self._key in device_data:
-                mode = device_data[self._key]
-                return self._get_mode_name(mode)
-        return "Inconnu"
+    def native_value(self) -> float | None:
+        """Retourne la durée du dernier cycle en secondes."""
+        duration = self.coordinator.metrics.last_cycle_duration
+        return round(duration, 3) if duration is not None else None
     
-    def _get_mode_name(self, mode: int) -> str:
-        """Convertit le numéro de mode en nom."""
-        mode_names = {
-            1: "Mode 1 - Priorité batterie",
-            2: "Mode 2 - Priorité micro-onduleur", 
-            3: "Mode 3 - Mode personnalisé"
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Retourne le nombre de cycles et le p95 de leur durée."""
+        metrics = self.coordinator.metrics
+        return {
+            "cycles": metrics.cycles,
+            "p95": metrics.cycle_latency.percentile(95),
         }
-        return mode_names.get(mode, f"Mode {mode}")
 
+
+class BigBlueApiCounterSensor(BigBlueHubSensor):
+    """Compteur cumulé de requêtes API (requêtes, erreurs ou nouvelles tentatives)."""
+    
+    def __init__(self, coordinator, config_entry: ConfigEntry, key: str, metric: str, icon: str):
+        super().__init__(coordinator, config_entry, key)
+        self._metric = metric
+        self._attr_icon = icon
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+    
+    @property
+    def native_value(self) -> int:
+        """Retourne la valeur cumulée depuis le démarrage."""
+        return getattr(self.coordinator.metrics, self._metric)
+    
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Retourne le détail par endpoint."""
+        metrics = self.coordinator.metrics
+        if self._metric == "total_errors":
+            return {endpoint: dict(stats.errors) for endpoint, stats in metrics.endpoints.items()}
+        if self._metric == "total_retries":
+            return {endpoint: stats.retries for endpoint, stats in metrics.endpoints.items()}
+        return {endpoint: stats.requests for endpoint, stats in metrics.endpoints.items()}
+
+
+class BigBlueEndpointLatencySensor(BigBlueHubSensor):
+    """Latence p95 d'un endpoint Powafree, avec l'histogramme en attributs."""
+    
+    def __init__(self, coordinator, config_entry: ConfigEntry, endpoint: str, label: str):
+        super().__init__(coordinator, config_entry, f"latency_{label}")
+        self._endpoint = endpoint
+        self._attr_icon = "mdi:timer-sand"
+        self._attr_native_unit_of_measurement = UnitOfTime.SECONDS
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+    
+    @property
+    def native_value(self) -> float | None:
+        """Retourne la latence p95 estimée en secondes."""
+        stats = self.coordinator.metrics.endpoints.get(self._endpoint)
+        return stats.latency.percentile(95) if stats else None
+    
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Retourne compteurs, percentiles et histogramme de l'endpoint."""
+        stats = self.coordinator.metrics.endpoints.get(self._endpoint)
+        return stats.as_dict() if stats else None
@@ -0,0 +1,78 @@
+"""Services de l'intégration Big Blue."""
+from __future__ import annotations
+
+import time
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN
+from .history import HISTORY_FIELDS
+
+SERVICE_GET_TELEMETRY_HISTORY = "get_telemetry_history"
+
+ATTR_DEVICE_MAC = "device_mac"
+ATTR_WINDOW = "window"
+ATTR_LAST = "last"
+ATTR_FIELDS = "fields"
+ATTR_INCLUDE_SAMPLES = "include_samples"
+
+GET_TELEMETRY_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DEVICE_MAC): cv.string,
+        vol.Optional(ATTR_WINDOW, default=3600): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(ATTR_LAST): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(ATTR_FIELDS): vol.All(cv.ensure_list, [vol.In(HISTORY_FIELDS)]),
+        vol.Optional(ATTR_INCLUDE_SAMPLES, default=True): cv.boolean,
+    }
+)
+
+
+def async_register_services(hass: HomeAssistant) -> None:
+    """Enregistre les services Big Blue (une seule fois pour toutes les entrées)."""
+    if hass.services.has_service(DOMAIN, SERVICE_GET_TELEMETRY_HISTORY):
+        return
+
+    async def async_get_telemetry_history(call: ServiceCall) -> ServiceResponse:
+        """Retourne les mesures récentes et leurs statistiques (min/max/moyenne/dernière)."""
+        device_mac = call.data.get(ATTR_DEVICE_MAC)
+        # Historique horodaté en temps monotone, converti en temps UNIX pour la réponse
+        now = time.monotonic()
+        clock_offset = time.time() - now
+        since = now - call.data[ATTR_WINDOW]
+        last = call.data.get(ATTR_LAST)
+        fields = tuple(call.data.get(ATTR_FIELDS) or HISTORY_FIELDS)
+
+        devices = {}
+        for entry_data in hass.data.get(DOMAIN, {}).values():
+            coordinator = entry_data["coordinator"]
+            for mac, history in coordinator.history.items():
+                if device_mac is not None and mac != device_mac:
+                    continue
+                snapshot = (coordinator.data or {}).get(mac)
+                result = {
+                    "device_name": snapshot.device_name if snapshot else None,
+                    "stats": {name: history.stats(name, since, last) for name in fields},
+                }
+                if call.data[ATTR_INCLUDE_SAMPLES]:
+                    samples = history.samples(since, last, fields)
+                    for sample in samples:
+                        sample["timestamp"] += clock_offset
+                    result["samples"] = samples
+                devices[mac] = result
+
+        if device_mac is not None and not devices:
+            raise ServiceValidationError(f"Aucun historique pour l'appareil {device_mac}")
+
+        return {"devices": devices}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_TELEMETRY_HISTORY,
+        async_get_telemetry_history,
+        schema=GET_TELEMETRY_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
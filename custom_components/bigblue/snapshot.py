@@ -0,0 +1,177 @@
+"""Instantané typé des données d'un appareil Big Blue."""
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass, field, fields
+from typing import Any
+
+from .fields import apply_settings, apply_telemetry
+
+
+@dataclass(slots=True, eq=False)
+class DeviceSnapshot:
+    """Dernières valeurs connues d'un appareil, mises à jour sur place.
+
+    Un seul objet par appareil pour toute la durée de l'intégration : chaque
+    cycle réécrit ses champs au lieu de construire un nouveau dict. `version`
+    est incrémenté à chaque modification, ce qui permet aux consommateurs de
+    savoir si l'instantané a changé depuis leur dernière lecture.
+
+    Les méthodes `get`, `items` et `in` conservent la compatibilité avec les
+    lectures par clé (`device_data.get("soc")`).
+    """
+
+    device_mac: str
+    device_name: str
+    # Batterie
+    soc: float | None = 0.0
+    soh: float | None = 0.0
+    voltage: float | None = 0.0
+    current: float | None = 0
+    power: float | None = 0.0
+    remaining_capacity: float | None = 0.0
+    rated_capacity: float | None = 0.0
+    # Panneaux solaires
+    pv1_voltage: float | None = 0.0
+    pv1_current: float | None = 0
+    pv1_power: float | None = 0.0
+    pv2_voltage: float | None = 0.0
+    pv2_current: float | None = 0
+    pv2_power: float | None = 0.0
+    pv_total_power: float | None = 0.0
+    # Production d'énergie
+    daily_generation: float | None = 0.0
+    total_generation: float | None = 0.0
+    daily_output_energy: float | None = 0.0
+    total_output_energy: float | None = 0.0
+    # Température, CO2 et temps de fonctionnement
+    max_temperature: float | None = 0.0
+    min_temperature: float | None = 0.0
+    daily_co2_savings: float | None = 0
+    daily_runtime: float | None = 0.0
+    total_runtime: float | None = 0
+    battery_count: int | None = 0
+    status: int | None = 0
+    # Paramètres
+    current_mode: int = 1
+    discharge_threshold: float = 10
+    bms_enable: bool = False
+    grid_enable: bool = False
+    settings: dict[str, Any] = field(default_factory=dict)
+    # Indicateurs dérivés (voir analytics.EnergyAnalytics)
+    time_to_empty: float | None = None  # h
+    time_to_full: float | None = None  # h
+    round_trip_efficiency: float | None = None  # %
+    self_consumption: float | None = None  # %
+    charged_energy: float = 0.0  # kWh
+    discharged_energy: float = 0.0  # kWh
+    # État
+    last_update: float | None = None
+    stale: bool = False
+    offline: bool = False
+    version: int = 0
+
+    def update(
+        self,
+        telemetry: Mapping[str, Any],
+        settings: Mapping[str, Any],
+        device_name: str,
+    ) -> bool:
+        """Applique une réponse complète ; retourne True si une valeur a changé."""
+        changed = apply_telemetry(self, telemetry)
+        changed = self._apply_settings(settings) or changed
+        last_update = telemetry.get("last_update")
+        if (
+            last_update != self.last_update
+            or device_name != self.device_name
+            or self.stale
+            or self.offline
+        ):
+            self.last_update = last_update
+            self.device_name = device_name
+            self.stale = False
+            self.offline = False
+            changed = True
+        if changed:
+            self.version += 1
+        return changed
+
+    def update_settings(self, settings: Mapping[str, Any]) -> bool:
+        """Applique des paramètres seuls (rafraîchissement ciblé) ; True si une valeur a changé."""
+        changed = self._apply_settings(settings)
+        if changed:
+            self.version += 1
+        return changed
+
+    def _apply_settings(self, settings: Mapping[str, Any]) -> bool:
+        """Remplace les paramètres sans toucher au compteur de version."""
+        # Les paramètres en cache sont le même objet d'un cycle à l'autre
+        if settings is self.settings:
+            return False
+        changed = apply_settings(self, settings)
+        if settings != self.settings:
+            changed = True
+        self.settings = settings
+        return changed
+
+    def apply_values(self, values: Mapping[str, Any]) -> bool:
+        """Enregistre des valeurs calculées ou attendues ; retourne True si l'une a changé.
+
+        Sert aux indicateurs dérivés et aux paramètres affichés avant
+        confirmation par l'appareil (voir coordinator.async_set_settings).
+        """
+        changed = False
+        for name, value in values.items():
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                changed = True
+        if changed:
+            self.version += 1
+        return changed
+
+    def mark_offline(self) -> None:
+        """Signale l'appareil hors ligne en conservant ses dernières valeurs."""
+        if not self.offline:
+            self.offline = True
+            self.version += 1
+
+    # Lecture par clé (compatibilité avec les données sous forme de dict)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Valeur d'un champ, ou `default` s'il n'existe pas."""
+        if key in _FIELD_NAMES:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        """Valeur d'un champ (KeyError s'il n'existe pas)."""
+        if key not in _FIELD_NAMES:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        """Indique si le champ existe."""
+        return key in _FIELD_NAMES
+
+    def keys(self) -> tuple[str, ...]:
+        """Noms des champs publiés."""
+        return _DATA_FIELDS
+
+    def items(self) -> Iterator[tuple[str, Any]]:
+        """Paires (champ, valeur) des champs publiés, sans copie."""
+        for name in _DATA_FIELDS:
+            yield name, getattr(self, name)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Copie sérialisable (cache local, diagnostics)."""
+        return dict(self.items())
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> DeviceSnapshot:
+        """Reconstruit un instantané depuis le cache local (champs inconnus ignorés)."""
+        return cls(**{key: value for key, value in data.items() if key in _FIELD_NAMES})
+
+
+_FIELD_NAMES = frozenset(item.name for item in fields(DeviceSnapshot))
+# Champs de données (le compteur de version n'en fait pas partie)
+_DATA_FIELDS = tuple(item.name for item in fields(DeviceSnapshot) if item.name != "version")
@@ -4,12 +4,11 @@ from typing import Any
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.helpers import translation
 
 from .const import DOMAIN
+from .entity import BigBlueDeviceEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -22,77 +21,69 @@ async def async_setup_entry(
     """Set up Big Blue switches from a config entry."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
     
-    entities = []
+    # Transport local : les paramètres ne sont ni lus ni modifiables
+    if not coordinator.api_client.supports_settings:
+        return
     
-    # Créer des switches pour chaque batterie
-    devices_data = coordinator.data
-    if not devices_data:
+    if not coordinator.data:
         _LOGGER.warning("⚠️ Aucune donnée du coordinateur - Aucun switch créé")
-        return
     
-    for device_mac, device_info in devices_data.items():
-        device_name = device_info.get("device_name", f"Big Blue {device_mac}")
-        
-        # Switches pour cette batterie
-        device_switches = [
-            BigBlueMode1Switch(coordinator, device_mac, f"Mode 1 {device_name}"),
-            BigBlueMode2Switch(coordinator, device_mac, f"Mode 2 {device_name}"),
-            BigBlueMode3Switch(coordinator, device_mac, f"Mode 3 {device_name}"),
-        ]
+    @callback
+    def _async_add_devices(device_macs: list[str]) -> None:
+        """Crée les switches des batteries nouvellement découvertes."""
+        entities = []
+        for device_mac in device_macs:
+            device_info = coordinator.data.get(device_mac, {})
+            device_name = device_info.get("device_name", f"Big Blue {device_mac}")
+            
+            # Switches pour cette batterie
+            device_switches = [
+                BigBlueMode1Switch(coordinator, device_mac, f"Mode 1 {device_name}"),
+                BigBlueMode2Switch(coordinator, device_mac, f"Mode 2 {device_name}"),
+                BigBlueMode3Switch(coordinator, device_mac, f"Mode 3 {device_name}"),
+            ]
+            
+            entities.extend(device_switches)
+            _LOGGER.info("🔧 %d switches créés pour %s", len(device_switches), device_name)
         
-        entities.extend(device_switches)
-        _LOGGER.info(f"🔧 {len(device_switches)} switches créés pour {device_name}")
+        async_add_entities(entities)
     
-    async_add_entities(entities)
+    # Ajout des batteries présentes puis de celles découvertes plus tard
+    config_entry.async_on_unload(coordinator.async_add_device_listener(_async_add_devices))
 
 
-class BigBlueSwitch(CoordinatorEntity, SwitchEntity):
+class BigBlueSwitch(BigBlueDeviceEntity, SwitchEntity):
     """Switch de base pour Big Blue."""
     
+    _watched_keys = ("current_mode",)
+    
     def __init__(self, coordinator, device_mac: str, name: str):
         """Initialise le switch."""
-        super().__init__(coordinator)
-        self._device_mac = device_mac
+        super().__init__(coordinator, device_mac)
         self._attr_name = name
         self._attr_unique_id = f"bigblue_{device_mac}_{self.__class__.__name__.lower()}"
         self._attr_is_on = False
         self._translation_key = self.__class__.__name__.lower().replace("bigblue", "").replace("switch", "")
     
-    @property
-    def device_info(self):
-        """Retourne les informations de l'appareil."""
-        return {
-            "identifiers": {(DOMAIN, self._device_mac)},
-            "name": self.coordinator.data.get(self._device_mac, {}).get("device_name", f"Big Blue {self._device_mac}"),
-            "manufacturer": "Big Blue",
-            "model": "Battery System",
-            "sw_version": "1.0.0"
-        }
-    
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Active le mode."""
         try:
-            # Vérifier si le mode est déjà actif
-            current_mode = await self.coordinator.api_client.get_current_mode(self._device_mac)
-            if current_mode == self.mode_value:
-                _LOGGER.info(f"ℹ️ Mode {self.mode_value} déjà actif pour {self._device_mac}")
-                return
-            
-            success = await self.coordinator.api_client.set_device_mode(self._device_mac, self.mode_value)
+            # Affiché immédiatement, puis regroupé avec les autres commandes de
+            # l'appareil ; annulé si l'appareil ne l'applique pas
+            success = await self.coordinator.async_set_settings(
+                self._device_mac, current_mode=self.mode_value
+            )
             if success:
-                _LOGGER.info(f"✅ Mode {self.mode_value} activé pour {self._device_mac}")
-                
-                # Forcer la mise à jour des données du coordinateur
-                await self.coordinator.async_request_refresh()
+                _LOGGER.info("✅ Mode %s activé pour %s", self.mode_value, self._device_mac)
             else:
-                _LOGGER.error(f"❌ Échec activation mode {self.mode_value} pour {self._device_mac}")
+                _LOGGER.error("❌ Échec activation mode %s pour %s", self.mode_value, self._device_mac)
         except Exception as err:
-            _LOGGER.error(f"❌ Erreur activation mode {self.mode_value}: {err}")
+            _LOGGER.error("❌ Erreur activation mode %s: %s", self.mode_value, err)
     
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Désactive le mode."""
         # Les modes ne peuvent pas être "désactivés", on peut seulement changer de mode
-        _LOGGER.info(f"ℹ️ Mode {self.mode_value} ne peut pas être désactivé, utilisez un autre mode")
+        _LOGGER.info("ℹ️ Mode %s ne peut pas être désactivé, utilisez un autre mode", self.mode_value)
     
     async def _deactivate_other_modes(self):
         """Désactive les autres modes du même device."""
@@ -111,12 +102,8 @@ class BigBlueMode1Switch(BigBlueSwitch):
     @property
     def is_on(self) -> bool:
         """Retourne l'état du switch."""
-        if self.coordinator.data and self._device_mac:
-            device_data = self.coordinator.data.get(self._device_mac, {})
-            if device_data and "current_mode" in device_data:
-                current_mode = device_data.get("current_mode", 1)
-                return current_mode == 1
-        return False
+        snapshot = self.snapshot
+        return snapshot is not None and snapshot.current_mode == 1
 
 
 class BigBlueMode2Switch(BigBlueSwitch):
@@ -130,12 +117,8 @@ class BigBlueMode2Switch(BigBlueSwitch):
     @property
     def is_on(self) -> bool:
         """Retourne l'état du switch."""
-        if self.coordinator.data and self._device_mac:
-            device_data = self.coordinator.data.get(self._device_mac, {})
-            if device_data and "current_mode" in device_data:
-                current_mode = device_data.get("current_mode", 1)
-                return current_mode == 2
-        return False
+        snapshot = self.snapshot
+        return snapshot is not None and snapshot.current_mode == 2
 
 
 class BigBlueMode3Switch(BigBlueSwitch):
@@ -149,9 +132,5 @@ class BigBlueMode3Switch(BigBlueSwitch):
     @property
     def is_on(self) -> bool:
         """Retourne l'état du switch."""
-        if self.coordinator.data and self._device_mac:
-            device_data = self.coordinator.data.get(self._device_mac, {})
-            if device_data and "current_mode" in device_data:
-                current_mode = device_data.get("current_mode", 1)
-                return current_mode == 3
-        return False
+        snapshot = self.snapshot
+        return snapshot is not None and snapshot.current_mode == 3
@@ -0,0 +1,51 @@
+"""Limitation des avertissements répétés dans les logs."""
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Hashable
+
+from .const import LOG_THROTTLE_PERIOD
+
+
+class LogThrottle:
+    """Émet au plus un message par sujet et par période.
+
+    Les occurrences suivantes sont comptées sans être formatées ; le message
+    suivant indique combien ont été ignorées. Les arguments sont passés au
+    logger tels quels (formatage paresseux, comme `_LOGGER.warning("%s", x)`).
+    """
+
+    def __init__(self, logger: logging.Logger, period: float = LOG_THROTTLE_PERIOD) -> None:
+        """Initialise le limiteur."""
+        self._logger = logger
+        self.period = period
+        # sujet -> (instant du dernier message, occurrences ignorées depuis)
+        self._state: dict[Hashable, tuple[float, int]] = {}
+
+    def log(self, level: int, key: Hashable, msg: str, *args) -> bool:
+        """Journalise `msg` sauf si `key` a déjà été signalé pendant la période.
+
+        Retourne True si le message a été émis.
+        """
+        if not self._logger.isEnabledFor(level):
+            return False
+        now = time.monotonic()
+        last, suppressed = self._state.get(key, (None, 0))
+        if last is not None and now - last < self.period:
+            self._state[key] = (last, suppressed + 1)
+            return False
+        if suppressed:
+            msg = f"{msg} (%d occurrence(s) similaire(s) ignorée(s))"
+            args = (*args, suppressed)
+        self._logger.log(level, msg, *args)
+        self._state[key] = (now, 0)
+        return True
+
+    def warning(self, key: Hashable, msg: str, *args) -> bool:
+        """Avertissement limité."""
+        return self.log(logging.WARNING, key, msg, *args)
+
+    def error(self, key: Hashable, msg: str, *args) -> bool:
+        """Erreur limitée."""
+        return self.log(logging.ERROR, key, msg, *args)
@@ -0,0 +1,274 @@
+"""Banc d'essai du cycle de mise à jour Big Blue contre le faux serveur Powafree.
+
+Mesure, pour chaque cycle de BigBlueDataUpdateCoordinator :
+- la durée totale du cycle ;
+- le nombre de requêtes envoyées (par endpoint) ;
+- les latences p50 / p95 / p99 des requêtes.
+
+Avec --writes, enchaîne ensuite des changements de mode et de seuil sur un
+appareil via coordinator.async_set_settings, puis une rafale regroupée, une
+valeur déjà en place, un envoi annulé et une valeur refusée (retour arrière),
+et vérifie chaque résultat (code de sortie 1 sinon).
+
+Nécessite Home Assistant et aiohttp dans l'environnement Python.
+
+Exemple :
+    python tools/benchmark.py --devices 100 --latency 0.2 --cycles 5 --concurrency 8
+    python tools/benchmark.py --devices 10 --cycles 1 --writes 3
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from collections.abc import Callable
+from typing import Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.bigblue.api import ENDPOINT_SETTINGS_UPLOAD, BigBlueAPIClient, RequestRecord  # noqa: E402
+from custom_components.bigblue.const import COMMAND_DEBOUNCE  # noqa: E402
+from custom_components.bigblue.coordinator import BigBlueDataUpdateCoordinator  # noqa: E402
+from fake_powafree import add_fleet_arguments, fleet_config_from_args, start_fake_server  # noqa: E402
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Percentile au rang le plus proche (0 si aucune valeur)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    """Exécute les cycles et retourne le rapport."""
+    fake, runner, url = await start_fake_server(fleet_config_from_args(args))
+    config_dir = tempfile.mkdtemp(prefix="bigblue-bench-")
+    hass = HomeAssistant(config_dir)
+
+    api_client = BigBlueAPIClient("bench@example.com", "bench")
+    api_client.base_url = url
+    records: list[RequestRecord] = []
+    api_client.add_request_listener(records.append)
+
+    coordinator = BigBlueDataUpdateCoordinator(
+        hass,
+        api_client,
+        max_concurrency=args.concurrency,
+        device_timeout=args.device_timeout,
+        settings_interval=args.settings_interval,
+    )
+
+    cycles = []
+    all_latencies: list[float] = []
+    try:
+        for index in range(args.cycles):
+            if args.expire_tokens_every and index and index % args.expire_tokens_every == 0:
+                fake.expire_tokens()
+            records.clear()
+            fake.reset_counters()
+
+            start = time.perf_counter()
+            data = await coordinator._async_update_data()  # pylint: disable=protected-access
+            duration = time.perf_counter() - start
+
+            latencies = [record.duration for record in records]
+            all_latencies.extend(latencies)
+            cycles.append({
+                "cycle": index + 1,
+                "wall_time": round(duration, 4),
+                "requests": len(records),
+                "requests_by_endpoint": dict(Counter(record.endpoint for record in records)),
+                "codes": dict(Counter(str(record.code) for record in records)),
+                "devices_published": len(data),
+                "devices_offline": sum(1 for item in data.values() if item.get("offline")),
+                "p50": round(percentile(latencies, 50), 4),
+                "p95": round(percentile(latencies, 95), 4),
+                "p99": round(percentile(latencies, 99), 4),
+            })
+            if args.pause:
+                await asyncio.sleep(args.pause)
+        
+        writes = []
+        if args.writes:
+            # Comme après un rafraîchissement de Home Assistant
+            coordinator.data = data
+            writes = await run_writes(coordinator, fake, records, args.writes)
+    finally:
+        await api_client.async_close()
+        await runner.cleanup()
+        await hass.async_stop(force=True)
+
+    wall_times = [cycle["wall_time"] for cycle in cycles]
+    return {
+        "devices": args.devices,
+        "latency": args.latency,
+        "concurrency": args.concurrency,
+        "cycles": cycles,
+        "writes": writes,
+        "summary": {
+            "wall_time_mean": round(sum(wall_times) / len(wall_times), 4) if wall_times else 0.0,
+            "wall_time_max": max(wall_times, default=0.0),
+            "requests_per_cycle": round(sum(c["requests"] for c in cycles) / len(cycles), 2) if cycles else 0.0,
+            "latency_p50": round(percentile(all_latencies, 50), 4),
+            "latency_p95": round(percentile(all_latencies, 95), 4),
+            "latency_p99": round(percentile(all_latencies, 99), 4),
+        },
+    }
+
+
+async def run_writes(coordinator, fake, records: list, count: int) -> list[dict]:
+    """Écritures de paramètres de bout en bout sur le premier appareil en ligne.
+
+    Chaque scénario passe par coordinator.async_set_settings (file de
+    commandes, affichage optimiste) et vérifie les requêtes envoyées, la
+    valeur enregistrée par le faux serveur et celle affichée :
+    - `count` paires de changements de mode puis de seuil ;
+    - une rafale de changements regroupée en un seul envoi ;
+    - une valeur déjà en place, sans requête ;
+    - un envoi annulé avant son départ (déchargement), sans requête ;
+    - une valeur refusée par l'appareil, dont l'affichage est rétabli.
+    """
+    device = next(device for device in fake.devices.values() if not device.offline and not device.missing)
+    writes = []
+
+    def displayed(key: str) -> Any:
+        return coordinator.data[device.mac].get(key)
+
+    async def scenario(name: str, check: Callable[[list, int], bool], *requests) -> None:
+        records.clear()
+        start = time.perf_counter()
+        results = list(await asyncio.gather(*requests))
+        duration = time.perf_counter() - start
+        uploads = sum(1 for record in records if record.endpoint == ENDPOINT_SETTINGS_UPLOAD)
+        writes.append({
+            "scenario": name,
+            "ok": check(results, uploads),
+            "results": results,
+            "wall_time": round(duration, 4),
+            "requests": len(records),
+            "requests_by_endpoint": dict(Counter(record.endpoint for record in records)),
+        })
+
+    for index in range(count):
+        mode = 2 + index % 2
+        threshold = 15 + index
+        for key, value, api_key in (
+            ("current_mode", mode, "mode"),
+            ("discharge_threshold", threshold, "bmsPower"),
+        ):
+            await scenario(
+                f"{key}={value}",
+                lambda results, uploads, key=key, value=value, api_key=api_key: (
+                    results == [True] and device.settings.get(api_key) == value and displayed(key) == value
+                ),
+                coordinator.async_set_settings(device.mac, **{key: value}),
+            )
+
+    # Trois seuils et un mode en moins d'un délai anti-rebond : un seul envoi
+    await scenario(
+        "rafale",
+        lambda results, uploads: (
+            all(results) and uploads == 1
+            and device.settings.get("bmsPower") == 30 and device.settings.get("mode") == 1
+            and displayed("discharge_threshold") == 30
+        ),
+        *(coordinator.async_set_settings(device.mac, discharge_threshold=value) for value in (20, 25, 30)),
+        coordinator.async_set_settings(device.mac, current_mode=1),
+    )
+
+    await scenario(
+        "valeur déjà en place",
+        lambda results, uploads: results == [True] and not records,
+        coordinator.async_set_settings(device.mac, current_mode=1),
+    )
+
+    async def cancelled_write() -> bool:
+        task = asyncio.ensure_future(coordinator.async_set_settings(device.mac, discharge_threshold=35))
+        await asyncio.sleep(COMMAND_DEBOUNCE / 2)
+        coordinator.async_cancel_commands()
+        return await task
+
+    await scenario(
+        "envoi annulé",
+        lambda results, uploads: (
+            results == [False] and not records
+            and device.settings.get("bmsPower") == 30 and displayed("discharge_threshold") == 30
+        ),
+        cancelled_write(),
+    )
+
+    device.reject_settings = True
+    try:
+        await scenario(
+            "valeur refusée",
+            lambda results, uploads: (
+                results == [False] and uploads == 1
+                and device.settings.get("mode") == 1 and displayed("current_mode") == 1
+            ),
+            coordinator.async_set_settings(device.mac, current_mode=3),
+        )
+    finally:
+        device.reject_settings = False
+    return writes
+
+
+def _print_report(report: dict) -> None:
+    print(
+        f"Parc: {report['devices']} appareils - latence {report['latency']}s "
+        f"- concurrence {report['concurrency']}"
+    )
+    print(f"{'cycle':>5} {'durée (s)':>10} {'requêtes':>9} {'publiés':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for cycle in report["cycles"]:
+        print(
+            f"{cycle['cycle']:>5} {cycle['wall_time']:>10.3f} {cycle['requests']:>9} "
+            f"{cycle['devices_published']:>8} {cycle['p50']:>8.3f} {cycle['p95']:>8.3f} {cycle['p99']:>8.3f}"
+        )
+    summary = report["summary"]
+    print(
+        f"Moyenne: {summary['wall_time_mean']:.3f}s/cycle (max {summary['wall_time_max']:.3f}s), "
+        f"{summary['requests_per_cycle']} requêtes/cycle, "
+        f"latence p50={summary['latency_p50']:.3f}s p95={summary['latency_p95']:.3f}s "
+        f"p99={summary['latency_p99']:.3f}s"
+    )
+    for write in report["writes"]:
+        status = "OK" if write["ok"] else "ÉCHEC"
+        print(
+            f"Écriture {write['scenario']}: {status} - {write['requests']} requête(s) "
+            f"{write['requests_by_endpoint']} en {write['wall_time']:.3f}s"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_fleet_arguments(parser)
+    parser.add_argument("--cycles", type=int, default=5, help="Nombre de cycles mesurés")
+    parser.add_argument("--pause", type=float, default=0.0, help="Pause entre deux cycles (s)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Appareils interrogés en parallèle")
+    parser.add_argument("--device-timeout", type=float, default=20.0, help="Délai maximal par appareil (s)")
+    parser.add_argument("--settings-interval", type=float, default=600.0, help="Rafraîchissement des paramètres (s)")
+    parser.add_argument("--expire-tokens-every", type=int, default=0, help="Expire les jetons tous les N cycles")
+    parser.add_argument("--writes", type=int, default=0, help="Paires d'écritures mode / seuil vérifiées après les cycles")
+    parser.add_argument("--json", action="store_true", help="Rapport au format JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    if any(not write["ok"] for write in report["writes"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
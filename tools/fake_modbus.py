@@ -0,0 +1,143 @@
+"""Simulateur Modbus TCP local d'une batterie Big Blue.
+
+Répond à la fonction 0x03 (lecture de registres de maintien) sur les
+registres REGISTER_BATTERY_* de const.py, dont les valeurs évoluent à chaque
+lecture. Les adresses inconnues reçoivent l'exception 2 (adresse illégale),
+les autres fonctions l'exception 1. La latence est configurable.
+
+Ne dépend que de la bibliothèque standard.
+
+Utilisation autonome :
+    python tools/fake_modbus.py --port 5020 --unit-id 1 --latency 0.01
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import struct
+from dataclasses import dataclass, field
+
+# Registres de const.py (recopiés pour ne pas importer Home Assistant)
+REGISTER_BATTERY_VOLTAGE = 0x1000
+REGISTER_BATTERY_CURRENT = 0x1001
+REGISTER_BATTERY_SOC = 0x1002
+REGISTER_BATTERY_TEMPERATURE = 0x1003
+REGISTER_BATTERY_STATUS = 0x1004
+REGISTER_BATTERY_CAPACITY = 0x1005
+
+FUNCTION_READ_HOLDING_REGISTERS = 0x03
+EXCEPTION_ILLEGAL_FUNCTION = 1
+EXCEPTION_ILLEGAL_ADDRESS = 2
+
+_MBAP = struct.Struct(">HHHB")
+
+
+@dataclass
+class FakeModbusConfig:
+    """Paramètres de simulation."""
+
+    unit_id: int = 1
+    latency: float = 0.0  # Secondes avant chaque réponse
+    seed: int | None = None
+
+
+@dataclass
+class FakeBattery:
+    """Registres d'une batterie simulée (unités brutes du cloud)."""
+
+    registers: dict[int, int] = field(default_factory=lambda: {
+        REGISTER_BATTERY_VOLTAGE: 512,  # 51,2 V
+        REGISTER_BATTERY_CURRENT: 0,  # A (signé)
+        REGISTER_BATTERY_SOC: 650,  # 65,0 %
+        REGISTER_BATTERY_TEMPERATURE: 245,  # 24,5 °C (signé)
+        REGISTER_BATTERY_STATUS: 1,
+        REGISTER_BATTERY_CAPACITY: 3328,  # Wh restants
+    })
+
+    def tick(self, rng: random.Random) -> None:
+        """Fait évoluer les mesures entre deux lectures."""
+        current = max(-40, min(40, _signed(self.registers[REGISTER_BATTERY_CURRENT]) + rng.randint(-2, 2)))
+        self.registers[REGISTER_BATTERY_CURRENT] = current & 0xFFFF
+        soc = self.registers[REGISTER_BATTERY_SOC]
+        self.registers[REGISTER_BATTERY_SOC] = max(0, min(1000, soc + (1 if current > 0 else -1 if current < 0 else 0)))
+        self.registers[REGISTER_BATTERY_VOLTAGE] = 480 + self.registers[REGISTER_BATTERY_SOC] // 20
+        self.registers[REGISTER_BATTERY_CAPACITY] = self.registers[REGISTER_BATTERY_SOC] * 512 // 100
+
+
+def _signed(value: int) -> int:
+    return value - 0x10000 if value >= 0x8000 else value
+
+
+class FakeModbusServer:
+    """Serveur Modbus TCP simulé (une batterie par unité)."""
+
+    def __init__(self, config: FakeModbusConfig) -> None:
+        self.config = config
+        self.battery = FakeBattery()
+        self.requests = 0
+        self._rng = random.Random(config.seed)
+
+    def _respond(self, unit_id: int, pdu: bytes) -> bytes:
+        """Construit le PDU de réponse à une requête."""
+        function = pdu[0]
+        if function != FUNCTION_READ_HOLDING_REGISTERS or len(pdu) != 5:
+            return bytes((function | 0x80, EXCEPTION_ILLEGAL_FUNCTION))
+        address, count = struct.unpack(">HH", pdu[1:5])
+        addresses = range(address, address + count)
+        if unit_id != self.config.unit_id or not 1 <= count <= 125 or any(
+            item not in self.battery.registers for item in addresses
+        ):
+            return bytes((function | 0x80, EXCEPTION_ILLEGAL_ADDRESS))
+        self.battery.tick(self._rng)
+        values = [self.battery.registers[item] for item in addresses]
+        return bytes((function, 2 * count)) + struct.pack(f">{count}H", *values)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Traite les requêtes d'une connexion jusqu'à sa fermeture."""
+        try:
+            while True:
+                transaction, protocol, length, unit_id = _MBAP.unpack(await reader.readexactly(_MBAP.size))
+                pdu = await reader.readexactly(length - 1)
+                self.requests += 1
+                if self.config.latency:
+                    await asyncio.sleep(self.config.latency)
+                response = self._respond(unit_id, pdu)
+                writer.write(_MBAP.pack(transaction, protocol, len(response) + 1, unit_id) + response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def start_fake_server(config: FakeModbusConfig, host: str = "127.0.0.1", port: int = 0):
+    """Démarre le simulateur ; retourne (simulateur, serveur asyncio, port)."""
+    fake = FakeModbusServer(config)
+    server = await asyncio.start_server(fake.handle, host, port)
+    return fake, server, server.sockets[0].getsockname()[1]
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    config = FakeModbusConfig(unit_id=args.unit_id, latency=args.latency, seed=args.seed)
+    fake, server, port = await start_fake_server(config, args.host, args.port)
+    print(f"Faux Modbus Big Blue sur {args.host}:{port} (unité {config.unit_id}) - Ctrl+C pour arrêter")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument("--unit-id", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Secondes avant chaque réponse")
+    parser.add_argument("--seed", type=int, default=None)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
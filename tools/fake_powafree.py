@@ -0,0 +1,288 @@
+"""Serveur local imitant l'API Powafree pour les tests de charge Big Blue.
+
+Endpoints simulés :
+- /api/user/login/email
+- /api/devices/list
+- /api/devices/last_data
+- /api/devices/setting/download
+- /api/devices/setting/upload
+
+Le parc (1 à 500 appareils), la latence et les erreurs (1009 jeton expiré,
+1002 hors ligne, 1013 introuvable) sont configurables.
+
+Utilisation autonome :
+    python tools/fake_powafree.py --devices 20 --latency 0.15 --port 8080
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import time
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+CODE_OK = 0
+CODE_DEVICE_OFFLINE = 1002
+CODE_INVALID_TOKEN = 1009
+CODE_RECORD_NOT_FOUND = 1013
+
+USER_ID = 4242
+
+
+@dataclass
+class FakeFleetConfig:
+    """Paramètres de simulation."""
+
+    devices: int = 10
+    latency: float = 0.05  # Latence moyenne (secondes)
+    jitter: float = 0.02  # Variation aléatoire de la latence (secondes)
+    token_ttl: float = 3600.0  # Durée de vie d'un jeton (secondes)
+    offline_ratio: float = 0.0  # Part des appareils répondant 1002
+    missing_ratio: float = 0.0  # Part des appareils répondant 1013
+    invalid_token_rate: float = 0.0  # Probabilité d'un 1009 spontané
+    seed: int | None = None
+
+
+@dataclass
+class FakeDevice:
+    """Appareil simulé."""
+
+    mac: str
+    name: str
+    offline: bool = False
+    missing: bool = False
+    settings: dict = field(default_factory=dict)
+    reject_settings: bool = False  # Envois acquittés mais ignorés (valeur refusée)
+
+
+def _make_token(ttl: float) -> tuple[str, float]:
+    """Génère un jeton au format JWT (non signé) avec une expiration `exp`."""
+    expires_at = time.time() + ttl
+
+    def encode(part: dict) -> str:
+        raw = json.dumps(part, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    token = ".".join([
+        encode({"alg": "none", "typ": "JWT"}),
+        encode({"sub": USER_ID, "exp": int(expires_at), "jti": random.getrandbits(32)}),
+        "fake",
+    ])
+    return token, expires_at
+
+
+def _default_settings(mac: str) -> dict:
+    """Paramètres initiaux d'un appareil simulé."""
+    return {
+        "bleMac": mac,
+        "bmsEnable": True,
+        "bmsPower": 10,
+        "gridEnable": 0,
+        "mode": 1,
+        "peakShavingDetails": ["|00:00-23:59|4000|"],
+        "periodDetail": [["|00:00-23:59|0|"] for _ in range(7)],
+        "pricePerKwh": 0.25,
+        "timezone": 1.0,
+    }
+
+
+class FakePowafree:
+    """Application aiohttp simulant le cloud Powafree et comptant les requêtes."""
+
+    def __init__(self, config: FakeFleetConfig) -> None:
+        """Initialise le parc simulé."""
+        self.config = config
+        self._random = random.Random(config.seed)
+        self.tokens: dict[str, float] = {}
+        self.requests: dict[str, int] = {}
+        self.devices: dict[str, FakeDevice] = {}
+        for index in range(config.devices):
+            mac = f"AA:BB:CC:{index // 65536:02X}:{index // 256 % 256:02X}:{index % 256:02X}"
+            self.devices[mac] = FakeDevice(
+                mac=mac,
+                name=f"Big Blue {index + 1}",
+                offline=self._random.random() < config.offline_ratio,
+                missing=self._random.random() < config.missing_ratio,
+                settings=_default_settings(mac),
+            )
+
+        self.app = web.Application()
+        self.app.router.add_post("/api/user/login/email", self._login)
+        self.app.router.add_post("/api/devices/list", self._device_list)
+        self.app.router.add_post("/api/devices/last_data", self._last_data)
+        self.app.router.add_post("/api/devices/setting/download", self._settings_download)
+        self.app.router.add_post("/api/devices/setting/upload", self._settings_upload)
+
+    def expire_tokens(self) -> None:
+        """Invalide tous les jetons émis (simule une expiration côté serveur)."""
+        self.tokens.clear()
+
+    def reset_counters(self) -> None:
+        """Remet à zéro les compteurs de requêtes."""
+        self.requests.clear()
+
+    async def _simulate(self, request: web.Request) -> dict:
+        """Compte la requête, applique la latence et retourne le corps JSON."""
+        self.requests[request.path] = self.requests.get(request.path, 0) + 1
+        delay = self.config.latency + self._random.uniform(-self.config.jitter, self.config.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            return await request.json()
+        except json.JSONDecodeError:
+            return {}
+
+    def _check_token(self, request: web.Request) -> bool:
+        """Vérifie le jeton de la requête."""
+        token = request.headers.get("Authorization", "")
+        expires_at = self.tokens.get(token)
+        if expires_at is None or expires_at <= time.time():
+            return False
+        return self._random.random() >= self.config.invalid_token_rate
+
+    @staticmethod
+    def _reply(code: int, data=None, message: str = "success") -> web.Response:
+        return web.json_response({"code": code, "message": message, "data": data})
+
+    async def _login(self, request: web.Request) -> web.Response:
+        await self._simulate(request)
+        token, expires_at = _make_token(self.config.token_ttl)
+        self.tokens[token] = expires_at
+        return self._reply(CODE_OK, {"token": token, "userId": USER_ID, "name": "Fake user"})
+
+    async def _device_list(self, request: web.Request) -> web.Response:
+        await self._simulate(request)
+        if not self._check_token(request):
+            return self._reply(CODE_INVALID_TOKEN, message="Invalid token")
+        return self._reply(
+            CODE_OK,
+            [{"bleMac": device.mac, "name": device.name} for device in self.devices.values()],
+        )
+
+    def _device_or_error(self, body: dict) -> FakeDevice | web.Response:
+        device = self.devices.get(body.get("bleMac"))
+        if device is None or device.missing:
+            return self._reply(CODE_RECORD_NOT_FOUND, message="Record not found")
+        if device.offline:
+            return self._reply(CODE_DEVICE_OFFLINE, message="Device offline")
+        return device
+
+    async def _last_data(self, request: web.Request) -> web.Response:
+        body = await self._simulate(request)
+        if not self._check_token(request):
+            return self._reply(CODE_INVALID_TOKEN, message="Invalid token")
+        device = self._device_or_error(body)
+        if isinstance(device, web.Response):
+            return device
+
+        pv1 = self._random.randint(0, 4000)
+        pv2 = self._random.randint(0, 4000)
+        return self._reply(CODE_OK, {
+            "totalSoc": self._random.randint(100, 1000),
+            "totalSoh": 990,
+            "totalVoltage": self._random.randint(500, 560),
+            "totalCurrent": self._random.randint(-20, 20),
+            "totalPower": self._random.randint(-8000, 8000),
+            "totalRemainingCapacity": self._random.randint(500, 5000),
+            "TotalRatedCapacity": 5120,
+            "pv1V": 380, "pv1A": 5, "pv1W": pv1,
+            "pv2V": 380, "pv2A": 5, "pv2W": pv2,
+            "pvTotalPower": pv1 + pv2,
+            "dailyGeneration": self._random.randint(0, 10000),
+            "totalGeneration": 1_234_567,
+            "dailyOutputEnergy": self._random.randint(0, 8000),
+            "totalOutputEnergy": 987_654,
+            "maxTemperature": 310, "minTemperature": 250,
+            "dailyCo2Savings": 1200,
+            "dailyRuntime": 36000,
+            "totalRuntime": 1500,
+            "batteryCount": 1,
+            "status": 1,
+        })
+
+    async def _settings_download(self, request: web.Request) -> web.Response:
+        body = await self._simulate(request)
+        if not self._check_token(request):
+            return self._reply(CODE_INVALID_TOKEN, message="Invalid token")
+        device = self._device_or_error(body)
+        if isinstance(device, web.Response):
+            return device
+        return self._reply(CODE_OK, dict(device.settings))
+
+    async def _settings_upload(self, request: web.Request) -> web.Response:
+        body = await self._simulate(request)
+        if not self._check_token(request):
+            return self._reply(CODE_INVALID_TOKEN, message="Invalid token")
+        device = self._device_or_error(body)
+        if isinstance(device, web.Response):
+            return device
+        if not device.reject_settings:
+            device.settings.update({k: v for k, v in body.items() if k != "userId"})
+        return self._reply(CODE_OK)
+
+
+async def start_fake_server(config: FakeFleetConfig, host: str = "127.0.0.1", port: int = 0):
+    """Démarre le serveur ; retourne (FakePowafree, runner, url de base)."""
+    fake = FakePowafree(config)
+    runner = web.AppRunner(fake.app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+    return fake, runner, f"http://{host}:{bound_port}"
+
+
+def add_fleet_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options de simulation partagées avec le banc d'essai."""
+    parser.add_argument("--devices", type=int, default=10, help="Taille du parc (1-500)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latence moyenne (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Variation de latence (s)")
+    parser.add_argument("--token-ttl", type=float, default=3600.0, help="Durée de vie du jeton (s)")
+    parser.add_argument("--offline-ratio", type=float, default=0.0, help="Part d'appareils en 1002")
+    parser.add_argument("--missing-ratio", type=float, default=0.0, help="Part d'appareils en 1013")
+    parser.add_argument("--invalid-token-rate", type=float, default=0.0, help="Probabilité d'un 1009")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def fleet_config_from_args(args: argparse.Namespace) -> FakeFleetConfig:
+    """Construit la configuration de simulation depuis la ligne de commande."""
+    if not 1 <= args.devices <= 500:
+        raise SystemExit("--devices doit être compris entre 1 et 500")
+    return FakeFleetConfig(
+        devices=args.devices,
+        latency=args.latency,
+        jitter=args.jitter,
+        token_ttl=args.token_ttl,
+        offline_ratio=args.offline_ratio,
+        missing_ratio=args.missing_ratio,
+        invalid_token_rate=args.invalid_token_rate,
+        seed=args.seed,
+    )
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    fake, runner, url = await start_fake_server(fleet_config_from_args(args), args.host, args.port)
+    print(f"Faux Powafree sur {url} ({len(fake.devices)} appareils) - Ctrl+C pour arrêter")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    add_fleet_arguments(parser)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()